@@ -0,0 +1,103 @@
+# Kevin King, 9/18/23
+
+import pickle
+from array import array
+from SearchSolution import SearchSolution
+
+
+# Solves every start state of a search problem at once: a single breadth-first sweep
+# backward from goal_state stores, for every state that can reach the goal, its distance
+# to the goal and the next state on a shortest path. Any start state is then answered by
+# following next pointers. Works on problems with dense integer state ids (num_states,
+# state_index, index_state, as in FoxesProblem); problems whose moves are not reversible
+# can provide get_predecessors(state), otherwise get_successors is used.
+class DistanceTable:
+    def __init__(self, search_problem):
+        self.problem = search_problem
+
+        # distance[i]: moves from state i to the goal, -1 if the goal can't be reached
+        # next_index[i]: id of the next state on a shortest path, -1 at the goal
+        num_states = search_problem.num_states()
+        self.distance = array('i', [-1]) * num_states
+        self.next_index = array('i', [-1]) * num_states
+        self.nodes_visited = 0  # states expanded by the sweep
+        self.sweep()
+
+    # Breadth-first search backward from the goal over the whole state graph
+    def sweep(self):
+        state_index = self.problem.state_index
+        index_state = self.problem.index_state
+        get_predecessors = getattr(self.problem, "get_predecessors", self.problem.get_successors)
+
+        goal = state_index(self.problem.goal_state)
+        self.distance[goal] = 0
+        queue = array('i', [goal])
+        head = 0
+
+        while head < len(queue):
+            index = queue[head]
+            head += 1
+            self.nodes_visited += 1
+            depth = self.distance[index] + 1
+
+            for predecessor_state in get_predecessors(index_state(index)):
+                predecessor = state_index(predecessor_state)
+                if self.distance[predecessor] == -1:
+                    self.distance[predecessor] = depth
+                    self.next_index[predecessor] = index
+                    queue.append(predecessor)
+
+    # Dense id of a state of the table's problem. A state with more chickens or foxes
+    #  than the problem's totals belongs to another problem (and would alias another
+    #  state's id), so it raises ValueError
+    def checked_index(self, state):
+        l_chickens, l_foxes, boat = state
+        if not (0 <= l_chickens <= self.problem.total_chickens and 0 <= l_foxes <= self.problem.total_foxes
+                and boat in (0, 1)):
+            raise ValueError("{} is not a state of a table built for {} chickens and {} foxes".format(
+                state, self.problem.total_chickens, self.problem.total_foxes))
+        return self.problem.state_index(state)
+
+    # Number of moves from state to the goal (-1 if unsolvable)
+    def distance_to_goal(self, state):
+        return self.distance[self.checked_index(state)]
+
+    # Shortest solution from start_state, found in O(path length). Its nodes_visited is
+    #  the number of states the sweep expanded to build the table
+    def solve(self, start_state):
+        sol = SearchSolution(self.problem, "Distance table", start_state)
+        sol.nodes_visited = self.nodes_visited
+        index = self.checked_index(start_state)
+
+        if self.distance[index] == -1:
+            return sol
+
+        path = []
+        while index != -1:
+            path.append(self.problem.index_state(index))
+            index = self.next_index[index]
+        sol.path = path
+        return sol
+
+    # Write the table (and its problem) to disk so later runs can skip the sweep
+    def save(self, filename):
+        with open(filename, "wb") as f:
+            pickle.dump(self, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(filename):
+        with open(filename, "rb") as f:
+            return pickle.load(f)
+
+
+# Test code
+if __name__ == "__main__":
+    from FoxesProblem import FoxesProblem
+
+    table = DistanceTable(FoxesProblem((5, 4, 1)))
+    print(table.solve((5, 4, 1)))
+    print(table.solve((5, 3, 1)))
+    print("Distance from (4, 4, 1): ", table.distance_to_goal((4, 4, 1)))
+
+    # an unsafe start state can still move, so it is solvable like any other
+    print("Distance from (1, 2, 1): ", table.distance_to_goal((1, 2, 1)))
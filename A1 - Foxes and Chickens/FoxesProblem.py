@@ -1,43 +1,126 @@
 # Kevin King, 9/18/23
 
 class FoxesProblem:
-    def __init__(self, start_state):
+    def __init__(self, start_state, boat_capacity=2):
         self.start_state = start_state
         self.goal_state = (0, 0, 0)
         self.total_chickens = start_state[0]
         self.total_foxes = start_state[1]
-
-    # Get successor states for the given state
+        self.boat_capacity = boat_capacity
+
+        # Legal boat loads and the successor table only depend on the totals and the
+        # capacity, so they are computed once here instead of on every expansion
+        self.loads = self.enumerate_loads(boat_capacity)
+        self.successor_table = self.build_successor_table()
+
+    # Enumerate every (chickens, foxes) load the boat can carry: at least one animal,
+    # at most boat_capacity. Ordered by load size, then by imbalance, so that a capacity
+    # of 2 gives the classic (0,1),(1,0),(1,1),(0,2),(2,0) ordering
+    @staticmethod
+    def enumerate_loads(boat_capacity):
+        loads = [(c, f) for c in range(boat_capacity + 1) for f in range(boat_capacity + 1 - c)
+                 if c + f > 0]
+        loads.sort(key=lambda load: (load[0] + load[1], abs(load[0] - load[1]), load[0]))
+        return tuple(loads)
+
+    # Number of distinct states, i.e. the size of the dense successor table
+    def num_states(self):
+        return (self.total_chickens + 1) * (self.total_foxes + 1) * 2
+
+    # Dense integer index of a (chickens, foxes, boat) state
+    def state_index(self, state):
+        l_chickens, l_foxes, boat = state
+        return (l_chickens * (self.total_foxes + 1) + l_foxes) * 2 + boat
+
+    # Inverse of state_index
+    def index_state(self, index):
+        rest, boat = divmod(index, 2)
+        l_chickens, l_foxes = divmod(rest, self.total_foxes + 1)
+        return l_chickens, l_foxes, boat
+
+    # State codec used by the searches: the dense index already packs a state into a
+    # small int
+    def encode(self, state):
+        return self.state_index(state)
+
+    def decode(self, code):
+        return self.index_state(code)
+
+    # Precompute the successors of every safe state. Unsafe states can never be reached
+    # through get_successors, so their entries are left as None and only filled in if
+    # asked for (e.g. an unsafe start state)
+    def build_successor_table(self):
+        table = [None] * self.num_states()
+
+        for l_chickens in range(self.total_chickens + 1):
+            for l_foxes in range(self.total_foxes + 1):
+                if not self.is_valid_action(l_chickens, l_foxes):
+                    continue
+                for boat in (0, 1):
+                    state = (l_chickens, l_foxes, boat)
+                    table[self.state_index(state)] = self.expand(state)
+
+        return table
+
+    # Get successor states for the given state (table lookup)
     def get_successors(self, state):
-        successors = []
+        index = self.state_index(state)
+        successors = self.successor_table[index]
+        if successors is None:
+            successors = self.successor_table[index] = self.expand(state)
+        return successors
+
+    # Get the states that have the given state as a successor, for searching backwards
+    #  (bidirectional_search, DistanceTable). Moves are not simply reversible: an unsafe
+    #  state is never a successor, so it has no predecessors, but it still has successors
+    #  (it can only be a start state), so it is a predecessor of the states it moves to.
+    #  This doesn't depend on the problem's start state, so a DistanceTable answers for
+    #  every start state, unsafe or not.
+    def get_predecessors(self, state):
         l_chickens, l_foxes, boat = state
+        if not self.is_valid_action(l_chickens, l_foxes):
+            return ()
 
-        possible_actions = [(0, 1), (1, 0), (1, 1), (0, 2), (2, 0)]
+        # the boat crossed to this bank, so undo the load it took away from the other one
+        sign = 1 if boat == 0 else -1
+        new_boat = 1 - boat
 
-        # Loop through each possible action
-        for action in possible_actions:
-            if boat == 1:
-                new_l_chickens = l_chickens - action[0]
-                new_l_foxes = l_foxes - action[1]
-            else:
-                new_l_chickens = l_chickens + action[0]
-                new_l_foxes = l_foxes + action[1]
+        predecessors = []
+        for action in self.loads:
+            new_l_chickens = l_chickens + sign * action[0]
+            new_l_foxes = l_foxes + sign * action[1]
 
             if ((new_l_chickens > self.total_chickens or new_l_chickens < 0) or
                     (new_l_foxes > self.total_foxes or new_l_foxes < 0)):
                 continue
 
-            new_boat = 1 - boat
+            predecessors.append((new_l_chickens, new_l_foxes, new_boat))
+
+        return tuple(predecessors)
 
-            new_state = (new_l_chickens, new_l_foxes, new_boat)
-            # print(new_state)
+    # Compute the successors of the given state from scratch
+    def expand(self, state):
+        successors = []
+        l_chickens, l_foxes, boat = state
+
+        # Boat on the left bank takes animals away from it, otherwise brings them back
+        sign = -1 if boat == 1 else 1
+        new_boat = 1 - boat
+
+        # Loop through each possible action
+        for action in self.loads:
+            new_l_chickens = l_chickens + sign * action[0]
+            new_l_foxes = l_foxes + sign * action[1]
+
+            if ((new_l_chickens > self.total_chickens or new_l_chickens < 0) or
+                    (new_l_foxes > self.total_foxes or new_l_foxes < 0)):
+                continue
 
             # Check if the move is valid
             if self.is_valid_action(new_l_chickens, new_l_foxes):
-                new_state = (new_l_chickens, new_l_foxes, new_boat)
-                successors.append(new_state)
+                successors.append((new_l_chickens, new_l_foxes, new_boat))
 
-        return successors
+        return tuple(successors)
 
     def is_valid_action(self, l_chickens, l_foxes):
         r_chickens = self.total_chickens - l_chickens
@@ -53,6 +136,8 @@ class FoxesProblem:
 
     def __str__(self):
         string = "Foxes and chickens problem: " + str(self.start_state)
+        if self.boat_capacity != 2:
+            string += " with boat capacity " + str(self.boat_capacity)
         return string
 
 
@@ -73,3 +158,6 @@ if __name__ == "__main__":
     # print(FoxesProblem((1, 3, 0)))
     # print("Successors of (1, 3, 0): ", test_cp.get_successors((1, 3, 0)))
 
+    test_big = FoxesProblem((300, 300, 1), boat_capacity=10)
+    print("Successors of (300, 300, 1): ", test_big.get_successors((300, 300, 1)))
+    print(test_big)
@@ -5,18 +5,24 @@ class SearchSolution:
         self.problem_name = str(problem)
         self.search_method = search_method
         self.start_state = start_state
+        # animals on both banks together, which a start state partway through a crossing
+        # doesn't show
+        self.total_chickens = getattr(problem, "total_chickens", start_state[0])
+        self.total_foxes = getattr(problem, "total_foxes", start_state[1])
         self.path = []
         self.nodes_visited = 0
+        self.iteration_nodes = []  # nodes visited by each iteration of an iterative search
+        self.profile = None  # filled in by a SearchProfiler, if the search was given one
 
     # Illustrates the states at each point of the solution path
     def state_to_string(self, state):
         chickens, foxes, boat = state
         if boat == 1:
-            return (('C' * chickens) + ('F' * foxes) + ' |B~~| ' + ('C' * (self.start_state[0] - chickens)) +
-                    ('F' * (self.start_state[1] - foxes)))
+            return (('C' * chickens) + ('F' * foxes) + ' |B~~| ' + ('C' * (self.total_chickens - chickens)) +
+                    ('F' * (self.total_foxes - foxes)))
         else:
-            return (('C' * chickens) + ('F' * foxes) + ' |~~B| ' + ('C' * (self.start_state[0] - chickens)) +
-                    ('F' * (self.start_state[1] - foxes)))
+            return (('C' * chickens) + ('F' * foxes) + ' |~~B| ' + ('C' * (self.total_chickens - chickens)) +
+                    ('F' * (self.total_foxes - foxes)))
 
     def __str__(self):
         string = "----\n"
@@ -26,6 +32,8 @@ class SearchSolution:
         if len(self.path) > 0:
 
             string += "number of nodes visited: {:d}\n"
+            if self.iteration_nodes:
+                string += "nodes visited per iteration: " + str(self.iteration_nodes) + "\n"
             string += "solution length: {:d}\n"
             string += "path: {:s}\n"
 
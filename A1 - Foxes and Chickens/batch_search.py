@@ -0,0 +1,124 @@
+# Kevin King, 9/18/23
+
+from FoxesProblem import FoxesProblem
+from uninformed_search import bfs_search, encoded_bfs_search, dfs_search, ids_search, bfs_array_search, bidirectional_search
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import json
+import signal
+import sys
+import time
+
+# Solves a batch of independent foxes and chickens problems in parallel, one problem
+#  per worker process. Each problem is described by a spec dict, e.g.
+#
+#    {"start": [5, 4, 1]}
+#    {"start": [300, 300, 1], "capacity": 10, "search": "bfs_array"}
+#
+#  with optional "name", "capacity" (default 2) and "search" (default "bfs") keys.
+#  Summaries are streamed back in the order the problems finish:
+#
+#    for summary in solve_batch(specs, timeout=60):
+#        print(summary["name"], summary["status"], summary["moves"])
+#
+#  or from the command line, with the specs in a JSON list:
+#
+#    python batch_search.py specs.json --workers 64 --timeout 60
+
+
+SEARCHES = {
+    "bfs": bfs_search,
+    "bfs_encoded": encoded_bfs_search,
+    "bfs_array": bfs_array_search,
+    "bidirectional": bidirectional_search,
+    "dfs": dfs_search,
+    "ids": ids_search,
+}
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+# build the search problem described by a spec
+def build_problem(spec):
+    return FoxesProblem(tuple(spec["start"]), spec.get("capacity", 2))
+
+
+def spec_name(spec, index):
+    return spec.get("name", "foxes {} #{}".format(tuple(spec["start"]), index))
+
+
+def raise_timeout(signum, frame):
+    raise SearchTimeout()
+
+
+# Worker: solve one spec and return its summary. The per-problem timeout is enforced
+#  inside the worker with a real-time interval timer (where the platform has one), so
+#  a runaway search frees its process for the next problem instead of blocking it.
+def solve_spec(spec, name, timeout=None):
+    summary = {"name": name, "status": None, "search_method": None, "nodes_visited": 0,
+               "moves": 0, "elapsed": 0.0, "solution": None, "error": None}
+
+    use_timer = timeout is not None and hasattr(signal, "setitimer")
+    if use_timer:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    start = time.perf_counter()
+    try:
+        try:
+            problem = build_problem(spec)
+            solution = SEARCHES[spec.get("search", "bfs")](problem)
+        finally:
+            if use_timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    # the timer can still go off between the search returning and the cancel above,
+    #  so the timeout is caught outside the block that cancels it
+    except SearchTimeout:
+        summary["status"] = "timeout"
+    except Exception as e:
+        summary["status"] = "error"
+        summary["error"] = repr(e)
+    else:
+        summary["status"] = "solved" if len(solution.path) > 0 else "no solution"
+        summary["search_method"] = solution.search_method
+        summary["nodes_visited"] = solution.nodes_visited
+        # every step along the path is one boat crossing
+        summary["moves"] = max(len(solution.path) - 1, 0)
+        summary["solution"] = solution
+    summary["elapsed"] = time.perf_counter() - start
+
+    return summary
+
+
+# Solve every spec across a pool of worker processes (os.cpu_count() by default),
+#  yielding each problem's summary as soon as it finishes
+def solve_batch(specs, max_workers=None, timeout=None):
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(solve_spec, spec, spec_name(spec, i), timeout)
+                   for i, spec in enumerate(specs)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a batch of foxes and chickens problems.")
+    parser.add_argument("specs", help="JSON file holding a list of problem specs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per problem")
+    args = parser.parse_args(argv)
+
+    with open(args.specs) as f:
+        specs = json.load(f)
+
+    for summary in solve_batch(specs, args.workers, args.timeout):
+        summary.pop("solution")
+        print(json.dumps(summary), flush=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# Kevin King, 9/18/23
+
+from FoxesProblem import FoxesProblem
+from DistanceTable import DistanceTable
+from uninformed_search import bfs_search, encoded_bfs_search, dfs_search, ids_search, bfs_array_search, bidirectional_search
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+# Reproducible performance benchmark for the foxes and chickens searches.
+#  Builds a fixed-seed family of instances of growing size, runs every search
+#  algorithm on each of them and records wall time, nodes visited and peak memory.
+#  The results can be saved as a baseline and later runs compared against it:
+#
+#    python benchmark.py --save baseline.json
+#    python benchmark.py --baseline baseline.json
+#
+#  A comparison exits with status 1 if any run got slower, visited more nodes or
+#  used more memory than the baseline allows.
+
+
+SEED = 76
+SIZES = (3, 5, 10, 20, 40, 80)
+MIN_TIME_DIFF = 0.005
+
+
+# Search algorithms to benchmark: name -> function(problem) -> SearchSolution
+ALGORITHMS = {
+    "bfs": bfs_search,
+    "bfs_encoded": encoded_bfs_search,
+    "bfs_array": bfs_array_search,
+    "bidirectional": bidirectional_search,
+    "dfs": dfs_search,
+    "ids": ids_search,
+    "distance_table": lambda problem: DistanceTable(problem).solve(problem.start_state),
+}
+
+# Path-checking DFS can take exponential time and IDS re-expands every layer, so
+#  they are only run up to these sizes
+MAX_SIZE = {
+    "dfs": 10,
+    "ids": 40,
+}
+
+
+# Returns a list of (instance name, size, problem factory) tuples: for every size, a random
+#  number of foxes (at most the number of chickens) and a boat capacity of 2 to 4.
+#  Every instance gets its own generator seeded from seed and its size, so an instance
+#  stays the same when sizes are added to or removed from the family.
+def build_instances(seed=SEED, sizes=SIZES):
+    instances = []
+    for size in sizes:
+        rng = random.Random(seed * 1000 + size)
+        foxes = rng.randint(size // 2, size)
+        capacity = rng.randint(2, 4)
+        name = "foxes ({}, {}, 1) boat {}".format(size, foxes, capacity)
+        instances.append((name, size, lambda size=size, foxes=foxes, capacity=capacity:
+                          FoxesProblem((size, foxes, 1), capacity)))
+    return instances
+
+
+# Run one algorithm on one problem: wall time from a plain run, peak memory from a
+#  second run under tracemalloc (which slows the search down too much to time it)
+def measure(algorithm, make_problem, memory=True):
+    problem = make_problem()
+    start = time.perf_counter()
+    solution = algorithm(problem)
+    elapsed = time.perf_counter() - start
+
+    record = {
+        "time": elapsed,
+        "nodes": solution.nodes_visited,
+        "length": len(solution.path),
+        "peak_memory": None,
+    }
+
+    if memory:
+        problem = make_problem()
+        tracemalloc.start()
+        algorithm(problem)
+        record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return record
+
+
+def run_benchmarks(instances, memory=True):
+    results = []
+    for name, size, make_problem in instances:
+        for algorithm_name, algorithm in ALGORITHMS.items():
+            if size > MAX_SIZE.get(algorithm_name, size):
+                continue
+            record = measure(algorithm, make_problem, memory)
+            record["instance"] = name
+            record["algorithm"] = algorithm_name
+            results.append(record)
+            print("{:<28s} {:<15s} {:>9.4f}s {:>9d} nodes  peak {}".format(
+                name, algorithm_name, record["time"], record["nodes"], format_bytes(record["peak_memory"])))
+    return results
+
+
+# Compare results against a baseline. Nodes visited must not grow and path lengths
+#  must match (the searches are deterministic); time and peak memory may grow by the
+#  given fraction, and times within MIN_TIME_DIFF of the baseline are treated as noise.
+#  Returns a list of regression messages.
+def compare(results, baseline, tolerance=0.25):
+    expected = {(r["instance"], r["algorithm"]): r for r in baseline}
+    regressions = []
+
+    for record in results:
+        key = (record["instance"], record["algorithm"])
+        if key not in expected:
+            continue
+        old = expected[key]
+
+        if record["nodes"] > old["nodes"]:
+            regressions.append("{} / {}: nodes {} -> {}".format(key[0], key[1], old["nodes"], record["nodes"]))
+        if record["length"] != old["length"]:
+            regressions.append("{} / {}: path length {} -> {}".format(key[0], key[1], old["length"], record["length"]))
+        if record["time"] > max(old["time"] * (1 + tolerance), old["time"] + MIN_TIME_DIFF):
+            regressions.append("{} / {}: time {:.4f}s -> {:.4f}s".format(key[0], key[1], old["time"], record["time"]))
+        if (record["peak_memory"] is not None and old["peak_memory"] is not None
+                and record["peak_memory"] > old["peak_memory"] * (1 + tolerance)):
+            regressions.append("{} / {}: peak memory {} -> {}".format(
+                key[0], key[1], format_bytes(old["peak_memory"]), format_bytes(record["peak_memory"])))
+
+    return regressions
+
+
+def format_bytes(num_bytes):
+    if num_bytes is None:
+        return "-"
+    return "{:.1f} KB".format(num_bytes / 1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the foxes and chickens searches.")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare the results against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional growth in time and memory (default 0.25)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(build_instances(args.seed), not args.no_memory)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print("REGRESSION " + message)
+        if regressions:
+            return 1
+        print("no regressions against " + args.baseline)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 # Kevin King, 9/18/23
 
 from FoxesProblem import FoxesProblem
-from uninformed_search import bfs_search, dfs_search, ids_search
+from uninformed_search import bfs_search, encoded_bfs_search, dfs_search, ids_search, bfs_array_search, bidirectional_search
 
 # Create a few test problems:
 problem331 = FoxesProblem((3, 3, 1))
@@ -27,3 +27,24 @@ print("\n*** Start: (5,4,1) ***")
 print(bfs_search(problem541))
 print(dfs_search(problem541))
 print(ids_search(problem541))
+
+# BFS over the problem's integer state codes finds the same path as BFS over
+#  SearchNodes, and counts the same nodes
+for problem in (problem331, problem551, problem541):
+    solution = encoded_bfs_search(problem)
+    assert solution.path == bfs_search(problem).path
+    assert solution.nodes_visited == bfs_search(problem).nodes_visited
+
+# Large instance: array-backed BFS over the dense state ids
+problem_big = FoxesProblem((30, 30, 1), boat_capacity=4)
+print("\n*** Start: (30,30,1), boat capacity 4 ***")
+print(bfs_array_search(problem_big))
+print(bidirectional_search(problem_big))
+
+# More foxes than chickens: the goal bank would be unsafe, so there is no solution,
+#  and searching backwards from the goal must not make one up
+problem241 = FoxesProblem((2, 4, 1), boat_capacity=4)
+print("\n*** Start: (2,4,1), boat capacity 4 ***")
+solution = bidirectional_search(problem241)
+print(solution)
+assert len(solution.path) == 0 and len(bfs_search(problem241).path) == 0
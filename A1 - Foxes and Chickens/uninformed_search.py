@@ -1,5 +1,6 @@
 # Kevin King, 9/18/23
 
+from array import array
 from collections import deque
 from SearchSolution import SearchSolution
 
@@ -7,6 +8,7 @@ from SearchSolution import SearchSolution
 class SearchNode:
     # each search node except the root has a parent node
     # and all search nodes wrap a state object
+    __slots__ = ("state", "parent", "depth")
 
     def __init__(self, state, parent=None):
         # you write this part
@@ -16,7 +18,11 @@ class SearchNode:
 
 
 # ******* BREADTH-FIRST SEARCH ******* #
-def bfs_search(search_problem):
+def bfs_search(search_problem, profiler=None):
+    if profiler is not None:
+        profiler.start()
+        search_problem = profiler.attach(search_problem)
+
     # Set up start and goal states from the search problem
     start_state = search_problem.start_state
 
@@ -31,12 +37,14 @@ def bfs_search(search_problem):
     while queue:
         # Explore next state
         node = queue.popleft()
+        if profiler is not None:
+            profiler.expand(len(queue) + 1, len(visited))
 
         # Check if reached goal state
         if search_problem.goal_test(node.state):
             sol.nodes_visited = len(visited)
             backchain(node, sol)
-            return sol
+            return sol if profiler is None else profiler.finish(sol)
 
         # Enqueue them if not visited
         for successor_state in search_problem.get_successors(node.state):
@@ -47,7 +55,7 @@ def bfs_search(search_problem):
 
     # If queue is empty and no solution found
     sol.nodes_visited = len(visited)
-    return sol
+    return sol if profiler is None else profiler.finish(sol)
 
 
 # Helper function: Builds path from goal state to start state
@@ -57,14 +65,207 @@ def backchain(node, sol):
         node = node.parent
 
 
+# ******* ENCODED BREADTH-FIRST SEARCH ******* #
+# Same search as bfs_search, for problems with a state codec: encode(state) maps a state
+# to a small int and decode(code) maps it back, so the frontier, visited set and parent
+# map hold only ints; states are decoded just to be expanded. nodes_visited is counted
+# as bfs_search counts it (the start only once it is generated again as a successor).
+def encoded_bfs_search(search_problem, profiler=None):
+    if profiler is not None:
+        profiler.start()
+        search_problem = profiler.attach(search_problem)
+
+    start_state = search_problem.start_state
+    sol = SearchSolution(search_problem, "BFS", start_state)
+
+    encode = search_problem.encode
+    decode = search_problem.decode
+
+    # Parent code of every state reached (-1 for the start), doubling as the visited set
+    start = encode(start_state)
+    parents = {start: -1}
+    queue = deque([start])
+    start_generated = False
+
+    while queue:
+        # Explore next state
+        code = queue.popleft()
+        if profiler is not None:
+            profiler.expand(len(queue) + 1, len(parents))
+        state = decode(code)
+
+        # Check if reached goal state
+        if search_problem.goal_test(state):
+            sol.nodes_visited = len(parents) - 1 + start_generated
+            array_backchain(code, parents, decode, sol)
+            return sol if profiler is None else profiler.finish(sol)
+
+        # Enqueue them if not visited
+        for successor_state in search_problem.get_successors(state):
+            successor = encode(successor_state)
+            if successor not in parents:
+                parents[successor] = code
+                queue.append(successor)
+            elif successor == start:
+                start_generated = True
+
+    # If queue is empty and no solution found
+    sol.nodes_visited = len(parents) - 1 + start_generated
+    return sol if profiler is None else profiler.finish(sol)
+
+
+# ******* ARRAY-BACKED BREADTH-FIRST SEARCH ******* #
+# Same search as bfs_search, for problems that map their states to dense integer ids
+# through num_states(), state_index(state) and index_state(index) (see FoxesProblem).
+# Instead of a SearchNode per successor and a set of tuples, it keeps the frontier and
+# the parent of every state in flat int arrays and marks visited states in a bit array,
+# so each state costs a few bytes instead of a few hundred.
+def bfs_array_search(search_problem):
+    start_state = search_problem.start_state
+    sol = SearchSolution(search_problem, "BFS (array)", start_state)
+
+    state_index = search_problem.state_index
+    index_state = search_problem.index_state
+    get_successors = search_problem.get_successors
+
+    num_states = search_problem.num_states()
+    parents = array('i', [-1]) * num_states
+    visited = bytearray((num_states + 7) >> 3)
+
+    # FIFO queue: states are only ever appended, so a read position is enough
+    start = state_index(start_state)
+    visited[start >> 3] |= 1 << (start & 7)
+    queue = array('i', [start])
+    head = 0
+
+    while head < len(queue):
+        # Explore next state
+        index = queue[head]
+        head += 1
+        state = index_state(index)
+
+        # Check if reached goal state
+        if search_problem.goal_test(state):
+            sol.nodes_visited = len(queue)
+            array_backchain(index, parents, index_state, sol)
+            return sol
+
+        # Enqueue them if not visited
+        for successor_state in get_successors(state):
+            successor = state_index(successor_state)
+            if not visited[successor >> 3] & (1 << (successor & 7)):
+                visited[successor >> 3] |= 1 << (successor & 7)
+                parents[successor] = index
+                queue.append(successor)
+
+    # If queue is empty and no solution found
+    sol.nodes_visited = len(queue)
+    return sol
+
+
+# Helper function: Builds path from goal state to start state out of a parent array (or
+# dict) of integer ids, -1 marking the start
+def array_backchain(index, parents, index_state, sol):
+    path = []
+    while index != -1:
+        path.append(index_state(index))
+        index = parents[index]
+    path.reverse()
+    sol.path = path
+
+
+# ******* BIDIRECTIONAL BREADTH-FIRST SEARCH ******* #
+# Breadth-first search from both the start state and search_problem.goal_state,
+# stopping once the two frontiers meet. Problems whose moves are not reversible can
+# provide get_predecessors(state); otherwise get_successors is used for both directions.
+def bidirectional_search(search_problem):
+    start_state = search_problem.start_state
+    goal_state = search_problem.goal_state
+    get_predecessors = getattr(search_problem, "get_predecessors", search_problem.get_successors)
+
+    sol = SearchSolution(search_problem, "Bidirectional BFS", start_state)
+
+    # Each side maps a reached state to (neighbour one step closer to its root, depth)
+    forward = {start_state: (None, 0)}
+    backward = {goal_state: (None, 0)}
+    forward_layer = [start_state]
+    backward_layer = [goal_state]
+    meet = start_state if start_state == goal_state else None
+
+    while meet is None and forward_layer and backward_layer:
+        # Grow whichever frontier is smaller by one full layer
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meet = expand_layer(forward_layer, forward, backward,
+                                               search_problem.get_successors)
+        else:
+            backward_layer, meet = expand_layer(backward_layer, backward, forward, get_predecessors)
+
+    sol.nodes_visited = len(forward) + len(backward)
+    if meet is not None:
+        bidirectional_backchain(meet, forward, backward, sol)
+    return sol
+
+
+# Helper function: Expands every state of a layer, recording parents and depths. Returns
+# the next layer and the state where this side met the other side on the shortest
+# combined path (None if they did not meet)
+def expand_layer(layer, parents, other_parents, get_neighbours):
+    next_layer = []
+    meet = None
+    best_length = None
+
+    for state in layer:
+        depth = parents[state][1] + 1
+        for neighbour in get_neighbours(state):
+            if neighbour in parents:
+                continue
+            parents[neighbour] = (state, depth)
+            next_layer.append(neighbour)
+
+            # Finish the layer rather than stopping at the first meeting point, since a
+            # later state in the same layer can still close a shorter path
+            if neighbour in other_parents:
+                length = depth + other_parents[neighbour][1]
+                if best_length is None or length < best_length:
+                    best_length = length
+                    meet = neighbour
+
+    return next_layer, meet
+
+
+# Helper function: Joins the start half (followed back through forward) and the goal
+# half (followed forward through backward) of a bidirectional path
+def bidirectional_backchain(meet, forward, backward, sol):
+    path = []
+    state = meet
+    while state is not None:
+        path.append(state)
+        state = forward[state][0]
+    path.reverse()
+
+    state = backward[meet][0]
+    while state is not None:
+        path.append(state)
+        state = backward[state][0]
+    sol.path = path
+
+
 # ******* DEPTH-FIRST SEARCH ******* #
-def dfs_search(search_problem, depth_limit=100, node=None, sol=None):
+def dfs_search(search_problem, depth_limit=100, node=None, sol=None, profiler=None):
     # Base Case: if no node object given, create a new search from starting state
     if node is None:
         node = SearchNode(search_problem.start_state)
         sol = SearchSolution(search_problem, "DFS", search_problem.start_state)
 
+        # The profiled problem is passed down the recursion; only the top call finishes it
+        if profiler is not None:
+            profiler.start()
+            sol = dfs_search(profiler.attach(search_problem), depth_limit, node, sol, profiler)
+            return profiler.finish(sol)
+
     sol.nodes_visited += 1
+    if profiler is not None:
+        profiler.expand(node.depth + 1, node.depth + 1)
     # Base Case: check if reached goal state
     if search_problem.goal_test(node.state):
         backchain(node, sol)
@@ -76,7 +277,7 @@ def dfs_search(search_problem, depth_limit=100, node=None, sol=None):
             successor_node = SearchNode(successor_state, node)
             successor_node.depth = node.depth + 1
             if successor_node.depth < depth_limit:
-                new_sol = dfs_search(search_problem, depth_limit, successor_node, sol)
+                new_sol = dfs_search(search_problem, depth_limit, successor_node, sol, profiler)
                 if len(new_sol.path) > 0:
                     return new_sol
 
@@ -93,18 +294,80 @@ def check_path(node, successor_state):
 
 
 # ******* ITERATIVE DEEPENING SEARCH *******
-def ids_search(search_problem, depth_limit=100):
-    # Initialize depth_limit to start from 0
-    node = SearchNode(search_problem.start_state)
+def ids_search(search_problem, depth_limit=100, profiler=None):
+    if profiler is not None:
+        profiler.start()
+        search_problem = profiler.attach(search_problem)
+
     solution = SearchSolution(search_problem, "IDS", search_problem.start_state)
 
+    # Run depth-limited searches with increasing limits, recording how many nodes each
+    # iteration visits so the cost of re-expanding the shallower layers is visible
     for depth in range(depth_limit + 1):
-        result = dfs_search(search_problem, depth, node, solution)
+        visited_before = solution.nodes_visited
+        path, cutoff = depth_limited_search(search_problem, depth, solution, profiler)
+        solution.iteration_nodes.append(solution.nodes_visited - visited_before)
+
+        if path is not None:
+            solution.path = path
+            break
+
+        # Nothing was cut off by the limit, so deeper iterations would find nothing new
+        if not cutoff:
+            break
+
+    return solution if profiler is None else profiler.finish(solution)
+
+
+# Helper function: Iterative (non-recursive) depth-limited DFS used by ids_search.
+# States on the current path are kept in a set, so loop checks are O(1), and each
+# state's shallowest depth in this iteration is kept in a table, so a branch reaching
+# a state no shallower than before is pruned. Returns the path (or None) and whether
+# any node was cut off by the depth limit
+def depth_limited_search(search_problem, depth_limit, sol, profiler=None):
+    start_state = search_problem.start_state
+
+    sol.nodes_visited += 1
+    if search_problem.goal_test(start_state):
+        return [start_state], False
+
+    if profiler is not None:
+        profiler.expand(1, 1)
+    path = [start_state]
+    on_path = {start_state}
+    shallowest = {start_state: 0}
+    stack = [iter(search_problem.get_successors(start_state))]
+    cutoff = False
+
+    while stack:
+        successor_state = next(stack[-1], None)
+
+        # All successors of the deepest state tried: backtrack
+        if successor_state is None:
+            stack.pop()
+            on_path.discard(path.pop())
+            continue
+
+        depth = len(path)
+        if successor_state in on_path or shallowest.get(successor_state, depth + 1) <= depth:
+            continue
+        shallowest[successor_state] = depth
+
+        sol.nodes_visited += 1
+        if search_problem.goal_test(successor_state):
+            path.append(successor_state)
+            return path, cutoff
 
-        if len(result.path) > 0:
-            return solution
+        if depth < depth_limit:
+            if profiler is not None:
+                profiler.expand(len(stack) + 1, len(shallowest))
+            path.append(successor_state)
+            on_path.add(successor_state)
+            stack.append(iter(search_problem.get_successors(successor_state)))
+        else:
+            cutoff = True
 
-    return solution
+    return None, cutoff
 
 
 # def dfs_search(search_problem, depth_limit=100, node=None, sol=None):
@@ -0,0 +1,53 @@
+# Two-level bucket queue for searches whose priorities are small non-negative integers.
+#  Items are filed under (f, h): buckets[f][h] is a stack of the items pushed with that
+#  f-value and heuristic value, so push and pop are O(1) list operations instead of
+#  O(log n) heap operations. pop returns an item with the lowest f, and among those the
+#  lowest h, which is the highest g = f - h: ties go to the state closest to the goal.
+#  Items pushed with the same f and h come out last in, first out.
+#
+#  Like the heapq open list, the bucket queue has no decrease-key: a state reached again
+#  at a lower cost is pushed again, and the search skips the stale entry when it comes out.
+class BucketQueue:
+
+    def __init__(self):
+        self.buckets = []
+        self.size = 0
+        # no item is filed before (self.f, self.h), so pop starts looking there
+        self.f = 0
+        self.h = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, item, f, h):
+        buckets = self.buckets
+        while len(buckets) <= f:
+            buckets.append([])
+        bucket = buckets[f]
+        while len(bucket) <= h:
+            bucket.append([])
+        bucket[h].append(item)
+        self.size += 1
+
+        # an inconsistent heuristic can push below the current minimum
+        if f < self.f or (f == self.f and h < self.h):
+            self.f = f
+            self.h = h
+
+    # Remove and return an item with the lowest f, and the lowest h among those
+    def pop(self):
+        buckets = self.buckets
+        f = self.f
+        h = self.h
+
+        while True:
+            bucket = buckets[f]
+            while h < len(bucket):
+                if bucket[h]:
+                    self.f = f
+                    self.h = h
+                    self.size -= 1
+                    return bucket[h].pop()
+                h += 1
+            f += 1
+            h = 0
@@ -0,0 +1,88 @@
+# Binary min-heap of items with priorities that supports decrease-key: pushing an item
+#  that is already in the heap lowers its priority in place instead of adding a second
+#  entry, so every item is in the heap at most once. Priorities and items are kept in
+#  parallel lists and only the priorities are ever compared, so priorities should be
+#  tuples of numbers (which compare in C) and items just have to be hashable; position
+#  maps every item in the heap to its index in the lists.
+class IndexedHeap:
+
+    def __init__(self):
+        self.priorities = []
+        self.items = []
+        self.position = {}
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, item):
+        return item in self.position
+
+    # Add item with the given priority, or lower its priority if it is already in the
+    #  heap with a higher one. Returns whether the heap changed.
+    def push(self, item, priority):
+        index = self.position.get(item)
+        if index is None:
+            self.priorities.append(priority)
+            self.items.append(item)
+            index = len(self.items) - 1
+        elif priority < self.priorities[index]:
+            self.priorities[index] = priority
+        else:
+            return False
+
+        self.sift_up(index, item, priority)
+        return True
+
+    # Remove and return the (item, priority) with the lowest priority
+    def pop(self):
+        item = self.items[0]
+        priority = self.priorities[0]
+        del self.position[item]
+
+        last_item = self.items.pop()
+        last_priority = self.priorities.pop()
+        if len(self.items) > 0:
+            self.sift_down(0, last_item, last_priority)
+
+        return item, priority
+
+    # Move the hole at index up towards the root until item fits there, and put it there
+    def sift_up(self, index, item, priority):
+        priorities = self.priorities
+        items = self.items
+        position = self.position
+
+        while index > 0:
+            parent = (index - 1) >> 1
+            if priority >= priorities[parent]:
+                break
+            priorities[index] = priorities[parent]
+            items[index] = items[parent]
+            position[items[index]] = index
+            index = parent
+
+        priorities[index] = priority
+        items[index] = item
+        position[item] = index
+
+    # Move the hole at index down to a leaf along the smaller children, then up again
+    #  until item fits (like heapq, as the item from the end of the heap usually belongs
+    #  near the bottom), and put it there
+    def sift_down(self, index, item, priority):
+        priorities = self.priorities
+        items = self.items
+        position = self.position
+        size = len(items)
+
+        child = 2 * index + 1
+        while child < size:
+            if child + 1 < size and priorities[child + 1] < priorities[child]:
+                child += 1
+            priorities[index] = priorities[child]
+            items[index] = items[child]
+            position[items[index]] = index
+            index = child
+            child = 2 * index + 1
+
+        self.sift_up(index, item, priority)
+
@@ -1,3 +1,9 @@
+import mmap
+import os
+import random
+import struct
+from array import array
+from collections import OrderedDict, deque
 from time import sleep
 
 # Maze.py
@@ -23,40 +29,131 @@ from time import sleep
 # the command \robot x y adds a robot at a location. The first robot added
 # has index 0, and so forth.
 
+# Binary maze (.mazb) format, for big mazes that are loaded again and again:
+#  a header of MAZB_HEADER (magic, format version, width, height, number of robots),
+#  then the robot locations as 32-bit ints (x0, y0, x1, y1, ...), then the map, one byte
+#  per cell in self.map order. A .mazb file is memory-mapped, not parsed, so loading it
+#  takes the same time whatever the size of the maze, and the pages of the map are only
+#  read in from disk when they are used.
+
+
+# distance_map value for cells that can't be reached
+UNREACHABLE = 2 ** 31 - 1
+
+# most distances the cached distance maps of a maze hold between them (64 MB of 32-bit
+#  ints); the least recently used maps are dropped to stay under it
+DISTANCE_CACHE_CELLS = 1 << 24
+
+FLOOR = ord(".")
+
+MAZB_MAGIC = b"MAZB"
+MAZB_VERSION = 1
+MAZB_HEADER = struct.Struct("<4sIIII")
+
 
 class Maze:
 
     # internal structure:
-    #   self.walls: set of tuples with wall locations
+    #   self.map: one byte (the character from the file) per cell, in self.index order;
+    #     a bytearray, or a read-only memoryview of a memory-mapped .mazb file
+    #   self.mapped_file: the mmap of a .mazb file, None for a text maze
     #   self.width: number of columns
-    #   self.rows
-
-    def __init__(self, mazefilename):
-        self.robotloc = []
-        # read the maze file into a list of strings
-        f = open(mazefilename)
-        lines = []
-        for line in f:
-            line = line.strip()
-            # ignore blank limes
-            if len(line) == 0:
-                pass
-            elif line[0] == "\\":
-                #print("command")
-                # there's only one command, \robot, so assume it is that
-                parms = line.split()
-                x = int(parms[1])
-                y = int(parms[2])
-                self.robotloc.append(x)
-                self.robotloc.append(y)
+    #   self.height: number of rows
+    #   self.robotloc: robot locations, x0, y0, x1, y1, ...
+
+    # Load a maze from a text maze file, or from a .mazb file. With cache=True, a text
+    #  maze is loaded from the .mazb file next to it (same name, .mazb extension) if that
+    #  is at least as new, and the .mazb file is written after parsing otherwise.
+    def __init__(self, mazefilename, cache=False):
+        if mazefilename.endswith(".mazb"):
+            self.load_binary(mazefilename)
+        elif cache:
+            cachefilename = os.path.splitext(mazefilename)[0] + ".mazb"
+            if (os.path.exists(cachefilename)
+                    and os.path.getmtime(cachefilename) >= os.path.getmtime(mazefilename)):
+                self.load_binary(cachefilename)
             else:
-                lines.append(line)
-        f.close()
-
-        self.width = len(lines[0])
-        self.height = len(lines)
-
-        self.map = list("".join(lines))
+                self.load_text(mazefilename)
+                self.save_binary(cachefilename)
+        else:
+            self.load_text(mazefilename)
+
+        # shortest-path distance maps, keyed by the (x, y) they were computed from, least
+        # recently used first; shared by every problem built on this maze
+        self.distance_maps = OrderedDict()
+
+    # Parse a text maze file a line at a time, appending each row of the map straight
+    #  onto a bytearray, so only one line of the file is held as a string at a time
+    def load_text(self, mazefilename):
+        self.robotloc = []
+        self.map = bytearray()
+        self.mapped_file = None
+        self.width = None
+        self.height = 0
+
+        with open(mazefilename, "rb") as f:
+            for line in f:
+                line = line.strip()
+                # ignore blank limes
+                if len(line) == 0:
+                    pass
+                elif line[0] == ord("\\"):
+                    # there's only one command, \robot, so assume it is that
+                    parms = line.split()
+                    x = int(parms[1])
+                    y = int(parms[2])
+                    self.robotloc.append(x)
+                    self.robotloc.append(y)
+                else:
+                    if self.width is None:
+                        self.width = len(line)
+                    elif len(line) != self.width:
+                        raise ValueError("{}: row {} is {} cells wide, not {}".format(
+                            mazefilename, self.height, len(line), self.width))
+                    self.map += line
+                    self.height += 1
+
+        if self.width is None:
+            raise ValueError(mazefilename + ": no rows of floor and walls in the maze")
+
+    # Memory-map a .mazb file. The map is a read-only view of the file, so the maze's
+    #  walls can't be changed. The mapping stays open until close() is called (or the
+    #  with block the maze was opened in ends)
+    def load_binary(self, mazefilename):
+        with open(mazefilename, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.width, self.height, num_robots = MAZB_HEADER.unpack_from(data)
+        if magic != MAZB_MAGIC or version != MAZB_VERSION:
+            data.close()
+            raise ValueError(mazefilename + ": not a version " + str(MAZB_VERSION) + " .mazb file")
+
+        robots_start = MAZB_HEADER.size
+        map_start = robots_start + 8 * num_robots
+        self.robotloc = list(struct.unpack_from("<" + str(2 * num_robots) + "i", data, robots_start))
+        self.map = memoryview(data)[map_start:map_start + self.width * self.height]
+        self.mapped_file = data
+
+    # Write the maze to a .mazb file
+    def save_binary(self, mazefilename):
+        with open(mazefilename, "wb") as f:
+            f.write(MAZB_HEADER.pack(MAZB_MAGIC, MAZB_VERSION, self.width, self.height, len(self.robotloc) // 2))
+            f.write(struct.pack("<" + str(len(self.robotloc)) + "i", *self.robotloc))
+            f.write(self.map)
+
+    # Unmap a .mazb file; the maze can't be used after this. A text maze has nothing
+    #  to close
+    def close(self):
+        if self.mapped_file is not None:
+            self.map.release()
+            self.mapped_file.close()
+            self.mapped_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def index(self, x, y):
         return (self.height - y - 1) * self.width + x
@@ -68,7 +165,35 @@ class Maze:
         if y < 0 or y >= self.height:
             return False
 
-        return self.map[self.index(x, y)] == "."
+        return self.map[self.index(x, y)] == FLOOR
+
+    # Returns an array of the number of moves from (x, y) to every cell, indexed like
+    #  the map (self.index), with UNREACHABLE for walls and cells cut off from (x, y).
+    #  Computed by a breadth-first search over the floor, then cached on the maze; the
+    #  cache keeps as many of the most recently used maps as fit in DISTANCE_CACHE_CELLS
+    #  (at least one), so a search that asks for a map from every cell can't fill memory.
+    def distance_map(self, x, y):
+        if (x, y) in self.distance_maps:
+            self.distance_maps.move_to_end((x, y))
+            return self.distance_maps[(x, y)]
+
+        distances = array('i', [UNREACHABLE]) * (self.width * self.height)
+        if self.is_floor(x, y):
+            distances[self.index(x, y)] = 0
+            queue = deque([(x, y)])
+            while queue:
+                cx, cy = queue.popleft()
+                next_distance = distances[self.index(cx, cy)] + 1
+                for nx, ny in ((cx + 1, cy), (cx - 1, cy), (cx, cy + 1), (cx, cy - 1)):
+                    if self.is_floor(nx, ny) and distances[self.index(nx, ny)] == UNREACHABLE:
+                        distances[self.index(nx, ny)] = next_distance
+                        queue.append((nx, ny))
+
+        max_maps = max(DISTANCE_CACHE_CELLS // len(distances), 1)
+        while len(self.distance_maps) >= max_maps:
+            self.distance_maps.popitem(last=False)
+        self.distance_maps[(x, y)] = distances
+        return distances
 
     def has_robot(self, x, y):
         if x < 0 or x >= self.width:
@@ -89,7 +214,7 @@ class Maze:
     #  that they will need to be printed out in.
     def create_render_list(self):
         # print(self.robotloc)
-        renderlist = list(self.map)
+        renderlist = list(str(self.map, "ascii"))
 
         robot_number = 0
         for index in range(0, len(self.robotloc), 2):
@@ -123,6 +248,51 @@ def robotchar(robot_number):
     return chr(ord("A") + robot_number)
 
 
+# build a new maze based on specified width/height
+# wall_prob - probability of a wall at a specific tile
+# filename, num_robots - default to "maze<width>x<height>.maz" and a random 1-3 robots
+# rng - source of randomness; pass a seeded random.Random for a reproducible maze
+# returns the filename of the maze, number of robots, goal locations for the robots
+def build_maze(width, height, wall_prob, filename=None, num_robots=None, rng=random):
+    if filename is None:
+        filename = "maze" + str(width) + "x" + str(height) + ".maz"
+    out_maze = open(filename, "w")
+    available_positions = []
+
+    # the file lists the top row first, so row r holds y = height - 1 - r
+    for y in range(height - 1, -1, -1):
+        line = ""
+        for x in range(width):
+            if rng.uniform(0, 1) <= wall_prob:
+                line += "#"
+            else:
+                line += "."
+                available_positions.append((x, y))
+        out_maze.write(line + '\n')
+
+    # shuffles the potential starting positions for the robots
+    rng.shuffle(available_positions)
+
+    # starting number of robots
+    if num_robots is None:
+        num_robots = rng.randint(1, 3)
+    for i in range(num_robots):
+        x, y = available_positions.pop()
+        out_maze.write("\\robot " + str(x) + " " + str(y) + '\n')
+
+    # randomized goal locations for robots
+    goal_locations = []
+    for i in range(num_robots):
+        x, y = available_positions.pop()
+        goal_locations.append(x)
+        goal_locations.append(y)
+
+    out_maze.close()
+    print("created: " + filename)
+
+    return filename, num_robots, tuple(goal_locations)
+
+
 # Some test code
 if __name__ == "__main__":
     test_maze1 = Maze("maze1.maz")
@@ -1,4 +1,4 @@
-from Maze import Maze
+from Maze import Maze, FLOOR, UNREACHABLE
 from time import sleep
 
 
@@ -12,6 +12,23 @@ class MazeworldProblem:
         self.start_state = tuple([0]+maze.robotloc)
         self.total_robots = len(maze.robotloc) // 2
 
+        # moves cost 0 or 1 and the heuristics count moves, so astar_search can use
+        # an integer bucket queue as its open list
+        self.integer_costs = True
+
+        # bits per coordinate in the integer state encoding
+        self.coord_bits = max(maze.width, maze.height).bit_length()
+
+        # The walls never change, so the floor grid is worked out once here, and the moves
+        # out of a cell the first time a robot stands on it, rather than on every expansion
+        self.floor = self.build_floor_grid()
+        self.moves = {}
+
+        # true shortest-path distance from every cell to each robot's goal, ignoring the
+        # other robots; each is worked out by goal_distance_map the first time it is
+        # needed (and cached on the maze, so problems on the same maze share them)
+        self.goal_distances = [None] * (len(goal_locations) // 2)
+
     # String representation of MazeworldProblem
     def __str__(self):
         string = "Mazeworld problem: "
@@ -20,18 +37,58 @@ class MazeworldProblem:
         # given a sequence of states (including robot turn), modify the maze and print it out.
         # (Be careful, this does modify the maze!)
 
+    # Occupancy grid of the maze: floor[x + y * width] is 1 for a floor cell, 0 for a wall
+    def build_floor_grid(self):
+        width = self.maze.width
+        height = self.maze.height
+        # the map stores rows top to bottom, so each row is copied in whole and translated
+        # to 0/1 rather than checking cells one by one
+        to_floor = bytes(1 if c == FLOOR else 0 for c in range(256))
+        floor = bytearray(width * height)
+        for y in range(height):
+            start = self.maze.index(0, y)
+            floor[y * width:(y + 1) * width] = bytes(self.maze.map[start:start + width]).translate(to_floor)
+        return floor
+
+    # The (cell, x, y) floor cells one step east, west, north and south of a cell, in that
+    # order; cached in self.moves
+    def cell_moves(self, cell):
+        width = self.maze.width
+        height = self.maze.height
+        x, y = cell % width, cell // width
+        cell_moves = []
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            new_x, new_y = x + dx, y + dy
+            if 0 <= new_x < width and 0 <= new_y < height and self.floor[new_x + new_y * width]:
+                cell_moves.append((new_x + new_y * width, new_x, new_y))
+        cell_moves = self.moves[cell] = tuple(cell_moves)
+        return cell_moves
+
     # Input: current robot, followed by x,y coordinates
     # Output: current robot + 1, followed by x,y coordinates
     def get_successors(self, state):
-        self.maze.robotloc = tuple(state[1:])
-
-        successors = []
-
-        # Consider not moving, moving east, moving west, moving north, and moving south
-        for direction in range(5):
-            successor = self.move_robot(state, direction)
-            if successor != "Invalid move":
-                successors.append(successor)
+        width = self.maze.width
+        curr_robot = state[0]
+        x_idx = 2 * curr_robot + 1
+        next_robot = curr_robot + 1 if curr_robot < self.total_robots - 1 else 0
+
+        # Cells holding a robot, built once for all four moves
+        occupied = {state[i] + state[i + 1] * width for i in range(1, len(state), 2)}
+
+        # Only the moving robot's coordinates change, so successors are spliced together
+        # from the parts of the state around them
+        before = (next_robot,) + state[1:x_idx]
+        after = state[x_idx + 2:]
+
+        # Not moving costs 0, then moving east, west, north, and south costs 1
+        successors = [(0, before + state[x_idx:x_idx + 2] + after)]
+        cell = state[x_idx] + state[x_idx + 1] * width
+        cell_moves = self.moves.get(cell)
+        if cell_moves is None:
+            cell_moves = self.cell_moves(cell)
+        for cell, new_x, new_y in cell_moves:
+            if cell not in occupied:
+                successors.append((1, before + (new_x, new_y) + after))
 
         return successors
 
@@ -69,9 +126,31 @@ class MazeworldProblem:
 
     # Check if move is valid (new location is a floor and not occupied by another robot
     def is_valid_action(self, state, new_x, new_y):
-        if self.maze.is_floor(new_x, new_y) and not self.maze.has_robot(new_x, new_y):
-            return True
-        return False
+        if not self.maze.is_floor(new_x, new_y):
+            return False
+        for i in range(1, len(state), 2):
+            if state[i] == new_x and state[i + 1] == new_y:
+                return False
+        return True
+
+    # State codec: packs the robot turn and every coordinate into one int, turn in the
+    # high bits and each coordinate in coord_bits bits below it
+    def encode(self, state):
+        bits = self.coord_bits
+        code = state[0]
+        for i in range(1, len(state)):
+            code = (code << bits) | state[i]
+        return code
+
+    def decode(self, code):
+        bits = self.coord_bits
+        mask = (1 << bits) - 1
+        state = [0] * (2 * self.total_robots + 1)
+        for i in range(2 * self.total_robots, 0, -1):
+            state[i] = code & mask
+            code >>= bits
+        state[0] = code
+        return tuple(state)
 
     # Check if robots have reached goal locations
     def goal_test(self, locations):
@@ -87,6 +166,32 @@ class MazeworldProblem:
 
         return s
 
+    # Distance map (indexed by maze.index) to the goal of the given robot
+    def goal_distance_map(self, robot):
+        distances = self.goal_distances[robot]
+        if distances is None:
+            distances = self.maze.distance_map(self.goal_locations[2 * robot], self.goal_locations[2 * robot + 1])
+            self.goal_distances[robot] = distances
+        return distances
+
+    # Sum of each robot's true distance to its goal around the walls. Admissible, since
+    # other robots can only make a robot's path longer, and much better informed than
+    # the Manhattan distance on mazes with many walls. UNREACHABLE if any robot is cut
+    # off from its goal
+    def distance_heuristic(self, state):
+        s = 0
+        index = self.maze.index
+
+        for i, distances in enumerate(self.goal_distances):
+            if distances is None:
+                distances = self.goal_distance_map(i)
+            distance = distances[index(state[2 * i + 1], state[2 * i + 2])]
+            if distance == UNREACHABLE:
+                return UNREACHABLE
+            s += distance
+
+        return s
+
     # Visualize path solution
     def animate_path(self, path):
         # reset the robot locations in the maze
@@ -0,0 +1,98 @@
+import json
+from functools import wraps
+from time import perf_counter
+
+
+# Optional instrumentation for the searches. A search given a profiler times the
+# problem's get_successors and goal_test (and the heuristic, for A*), tracks the peak
+# frontier and visited-set sizes and counts expansions. Searches run without one
+# (profiler=None, the default) only pay a single None check per expansion.
+class SearchProfiler:
+    def __init__(self):
+        self.start()
+
+    # Reset all counters and start the clock; called by the search itself
+    def start(self):
+        self.times = {}
+        self.calls = {}
+        self.expansions = 0
+        self.peak_frontier = 0
+        self.peak_visited = 0
+        self.elapsed = 0.0
+        self.start_time = perf_counter()
+
+    # Wrap fn so the time spent in it and its number of calls are recorded under name
+    def timed(self, name, fn):
+        times = self.times
+        calls = self.calls
+        times[name] = 0.0
+        calls[name] = 0
+
+        @wraps(fn)
+        def timed_fn(*args):
+            start = perf_counter()
+            result = fn(*args)
+            times[name] += perf_counter() - start
+            calls[name] += 1
+            return result
+
+        return timed_fn
+
+    # Wrap a search problem so its get_successors and goal_test calls are timed
+    def attach(self, search_problem):
+        return ProfiledProblem(search_problem, self)
+
+    # Record one node expansion along with the current frontier and visited-set sizes
+    def expand(self, frontier_size, visited_size):
+        self.expansions += 1
+        if frontier_size > self.peak_frontier:
+            self.peak_frontier = frontier_size
+        if visited_size > self.peak_visited:
+            self.peak_visited = visited_size
+
+    # Stop the clock and attach the summary to the solution
+    def finish(self, sol):
+        self.elapsed = perf_counter() - self.start_time
+        sol.profile = self.summary(sol)
+        return sol
+
+    def expansions_per_second(self):
+        return self.expansions / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self, sol):
+        return {
+            "problem": sol.problem_name,
+            "search_method": sol.search_method,
+            "nodes_visited": sol.nodes_visited,
+            "solution_length": max(len(sol.path) - 1, 0),
+            "elapsed": self.elapsed,
+            "expansions": self.expansions,
+            "expansions_per_second": self.expansions_per_second(),
+            "peak_frontier": self.peak_frontier,
+            "peak_visited": self.peak_visited,
+            "times": dict(self.times),
+            "calls": dict(self.calls),
+        }
+
+    # Append the profile of a finished search as one JSON line. Extra keyword arguments
+    # (e.g. a configuration name) are stored alongside it
+    def write_jsonl(self, filename, sol, **labels):
+        record = dict(sol.profile if sol.profile is not None else self.summary(sol))
+        record.update(labels)
+        with open(filename, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+# Stands in for a search problem, timing get_successors and goal_test and passing every
+# other attribute through to the wrapped problem
+class ProfiledProblem:
+    def __init__(self, search_problem, profiler):
+        self.search_problem = search_problem
+        self.get_successors = profiler.timed("get_successors", search_problem.get_successors)
+        self.goal_test = profiler.timed("goal_test", search_problem.goal_test)
+
+    def __getattr__(self, name):
+        return getattr(self.search_problem, name)
+
+    def __str__(self):
+        return str(self.search_problem)
@@ -5,6 +5,8 @@ class SearchSolution:
         self.path = []
         self.nodes_visited = 0
         self.cost = 0
+        self.high_level_nodes = 0  # constraint tree nodes expanded by a two-level search like CBS
+        self.profile = None  # filled in by a SearchProfiler, if the search was given one
 
     def __str__(self):
         string = "----\n"
@@ -14,6 +16,8 @@ class SearchSolution:
         if len(self.path) > 0:
 
             string += "number of nodes visited: {:d}\n"
+            if self.high_level_nodes:
+                string += "constraint tree nodes expanded: " + str(self.high_level_nodes) + "\n"
             string += "solution length: {:d}\n"
             string += "cost: {:d}\n"
             string += "path: {:s}\n"
@@ -22,6 +26,8 @@ class SearchSolution:
                 self.nodes_visited, len(self.path), self.cost, str(self.path))
         else:
             string += "no solution found after visiting {:d} nodes\n"
+            if self.high_level_nodes:
+                string += "constraint tree nodes expanded: " + str(self.high_level_nodes) + "\n"
             string = string.format(self.problem_name, self.search_method, self.nodes_visited)
 
         return string
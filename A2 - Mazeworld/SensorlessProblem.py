@@ -1,21 +1,46 @@
-from Maze import Maze
+from Maze import Maze, UNREACHABLE
 from time import sleep
 
 
+# beliefs with at most this many possible locations get their exact diameter in
+#  diameter_heuristic; larger ones a lower bound on it
+EXACT_DIAMETER_CELLS = 32
+
+
 class SensorlessProblem:
 
     # Constructor: initialize SensorlessProblem with given maze
+    #  A state (the belief) is a bitset held in an int: bit maze.index(x, y) is set if the
+    #  robot may be at (x, y). The robot may start on any floor cell.
     def __init__(self, maze):
         self.maze = maze
-        locations = []  # list of possible locations of robot
-        for i in range(maze.width):
-            for j in range(maze.height):
-                # adds coordinates of floor cells to locations list
-                if maze.is_floor(i, j):
-                    locations.append(i)
-                    locations.append(j)
-        # converts locations list to a tuple and assigns it as the starting state
-        self.start_state = tuple(locations)
+        width = maze.width
+
+        # For every direction, the floor cells the robot can move out of that way; moving
+        # shifts their bits by the direction's index offset, and the other floor cells'
+        # bits stay put. Directions are east, west, south and north, as (dx, dy).
+        self.floor_mask = 0
+        for x in range(maze.width):
+            for y in range(maze.height):
+                if maze.is_floor(x, y):
+                    self.floor_mask |= 1 << maze.index(x, y)
+
+        self.moves = []
+        for dx, dy in ((1, 0), (-1, 0), (0, -1), (0, 1)):
+            movable = 0
+            for x in range(maze.width):
+                for y in range(maze.height):
+                    if maze.is_floor(x, y) and maze.is_floor(x + dx, y + dy):
+                        movable |= 1 << maze.index(x, y)
+            # rows are stored from the top, so moving north lowers the index by a row
+            shift = dx - dy * width
+            self.moves.append((movable, self.floor_mask & ~movable, shift))
+
+        self.start_state = self.floor_mask
+
+        # every move costs 1 and the heuristic counts locations, so astar_search can use
+        # an integer bucket queue as its open list
+        self.integer_costs = True
 
     # String representation of SensorlessProblem
     def __str__(self):
@@ -34,54 +59,102 @@ class SensorlessProblem:
 
         return successors
 
-    # Helper function that moves robots in specified direction and returns resulting state
+    # Helper function that moves robots in specified direction and returns resulting state:
+    #  the possible locations that can move shift over, the rest stay where they are
     def move_robots(self, state, direction):
-        # Keep track of the nodes currently in the successor list
-        coords = set()
-        r_list = []
-
-        # iterate through all robots' coordinates in current state
-        for i in range(0, len(state), 2):
-            movements = [(1, 0), (-1, 0), (0, -1), (0, 1)]  # possible movements
-            dx, dy = movements[direction]  # selects movement for current direction
-            x = state[i]
-            y = state[i + 1]
-
-            curr = (x + dx, y + dy)  # new coordinates after the move
-
-            # Adds new states to the successor list if not already
-            if curr not in coords:
-                # Checks if new coordinates are a valid move
-                if self.maze.is_floor(curr[0], curr[1]):
-                    coords.add(curr)
-                    r_list.append(curr[0])
-                    r_list.append(curr[1])
-                # Handles case where move isn't valid
-                else:
-                    coords.add((state[i], state[i + 1]))  # robot remains in current position
-                    r_list.append(state[i])
-                    r_list.append(state[i + 1])
-
-        # Cost is always one because we are always moving one robot
+        movable, stuck, shift = self.moves[direction]
+        moved = state & movable
+        if shift > 0:
+            moved <<= shift
+        else:
+            moved >>= -shift
+
         # Returns successor state with a cost of 1 for the move
-        return 1, tuple(r_list)
+        return 1, moved | (state & stuck)
 
-    # Checks if given state meets the goal requirements
+    # Checks if given state meets the goal requirements: a single possible location
     def goal_test(self, state):
-        return len(state) == 2
+        return state & (state - 1) == 0
 
-    # Possible heuristic function for the A* search algorithm
+    # Possible heuristic function for the A* search algorithm (not admissible: a single
+    #  move can rule out many locations at once)
     def possible_heuristic(self, state):
-        return len(state) // 2  # number of possible locations for the robot
+        return state.bit_count()  # number of possible locations for the robot
+
+    # Admissible heuristic from the two possible locations farthest apart (around the
+    #  walls). Every move moves both by at most one cell, so it brings them at most two
+    #  steps closer, and they have to meet: at least half their distance in moves.
+    #  Locations that can't reach each other can never meet, so the belief is a dead end.
+    #  Distances come from the maze's distance maps, which it caches up to a memory
+    #  bound, so on all but huge mazes each cell's map is worked out once. Large beliefs use a double sweep (the location farthest from
+    #  the first one, then the farthest from that), a lower bound on their diameter.
+    def diameter_heuristic(self, state):
+        cells = self.belief_cells(state)
+        if len(cells) <= 1:
+            return 0
+
+        if len(cells) <= EXACT_DIAMETER_CELLS:
+            diameter = 0
+            for cell in cells:
+                distances = self.cell_distances(cell)
+                diameter = max(diameter, max(map(distances.__getitem__, cells)))
+        else:
+            distances = self.cell_distances(cells[0])
+            farthest = max(cells, key=distances.__getitem__)
+            distances = self.cell_distances(farthest)
+            diameter = max(map(distances.__getitem__, cells))
+
+        if diameter >= UNREACHABLE:
+            return UNREACHABLE
+        return (diameter + 1) // 2
+
+    # Admissible heuristic from the number of possible locations. A move shifts the
+    #  locations that can move to distinct cells and leaves the rest on distinct cells,
+    #  so each cell ends up with at most two of them (its own, if it was stuck, and its
+    #  neighbour's): a move can at most halve the belief, and it takes at least
+    #  ceil(log2(n)) moves to get n locations down to one.
+    def merge_heuristic(self, state):
+        return (state.bit_count() - 1).bit_length()
+
+    # The better of the two admissible heuristics
+    def localization_heuristic(self, state):
+        return max(self.diameter_heuristic(state), self.merge_heuristic(state))
+
+    # Indices (maze.index) of the possible locations in a state, lowest first
+    def belief_cells(self, state):
+        bits = bin(state)[:1:-1]  # bit i of state is bits[i]
+        cells = []
+        i = bits.find("1")
+        while i >= 0:
+            cells.append(i)
+            i = bits.find("1", i + 1)
+        return cells
+
+    # Distance map (indexed by maze.index) from the cell with the given index
+    def cell_distances(self, index):
+        width = self.maze.width
+        return self.maze.distance_map(index % width, self.maze.height - 1 - index // width)
+
+    # The possible locations in a state as a flat (x0, y0, x1, y1, ...) tuple
+    def locations(self, state):
+        width = self.maze.width
+        height = self.maze.height
+        locations = []
+        while state:
+            index = (state & -state).bit_length() - 1
+            locations.append(index % width)
+            locations.append(height - 1 - index // width)
+            state &= state - 1
+        return tuple(locations)
 
     # Visualizes path solution
     def animate_path(self, path):
         # reset the robot locations in the maze
-        self.maze.robotloc = tuple(self.start_state)
+        self.maze.robotloc = self.locations(self.start_state)
 
         for state in path:
             print(str(self))
-            self.maze.robotloc = tuple(state)
+            self.maze.robotloc = self.locations(state)
             sleep(1)
 
             print(str(self.maze))
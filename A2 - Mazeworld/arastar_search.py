@@ -0,0 +1,156 @@
+from SearchSolution import SearchSolution
+from astar_search import same_state, unreachable, code_backchain
+from heapq import heapify, heappush, heappop
+from time import perf_counter
+
+# Anytime Repairing A* (ARA*, Likhachev, Gordon and Thrun) for Mazeworld and sensorless
+#  problems that have to be answered within a time budget.
+#  ARA* runs a series of weighted A* searches, ordered by g + w * h, with the weight
+#  lowered by weight_step (or to the current suboptimality bound, if that is lower)
+#  after every pass until it reaches 1. The first pass, with a large weight, finds a
+#  solution quickly; every later pass improves on it. Unlike restarting weighted A*
+#  from scratch, a pass reuses the costs found by the passes before it and only
+#  expands states whose costs went down since they were last expanded (the states
+#  kept in "inconsistent"), so later passes are cheap.
+#
+#  After every pass the best solution so far, a SearchSolution, is handed to
+#  callback(solution, bound) along with its suboptimality bound: with an admissible
+#  heuristic its cost is at most bound times the optimal cost. The search stops when the
+#  bound reaches 1 (the solution is optimal) or time_limit seconds have passed, and
+#  returns the best solution found (with an empty path if there was none yet).
+
+
+def arastar_search(search_problem, heuristic_fn, weight=3, weight_step=0.5, time_limit=None, callback=None):
+    encode = getattr(search_problem, "encode", same_state)
+    decode = getattr(search_problem, "decode", same_state)
+    deadline = None if time_limit is None else perf_counter() + time_limit
+    method = "ARA* with heuristic " + heuristic_fn.__name__
+
+    start_state = search_problem.start_state
+    start = encode(start_state)
+    search = AnytimeSearch(search_problem, heuristic_fn, encode, decode, weight)
+    search.add(start, start_state, 0, -1)
+
+    best = SearchSolution(search_problem, method)
+    while True:
+        finished = search.improve_path(deadline)
+        best.nodes_visited = search.nodes_visited
+        if search.goal is not None:
+            bound = search.bound()
+            if best.cost != search.goal_cost or len(best.path) == 0:
+                best = SearchSolution(search_problem, method + ", weight {:.3g}".format(weight))
+                best.path = code_backchain(search.goal, search.parents, decode)
+                best.cost = search.goal_cost
+                best.nodes_visited = search.nodes_visited
+            if callback is not None:
+                callback(best, bound)
+            if bound <= 1:
+                break
+
+        # a pass that ran out of states without finding a goal explored everything
+        if not finished or search.goal is None or weight <= 1:
+            break
+
+        # a weight above the bound could not find anything better, so skip those passes
+        weight = max(1, min(weight - weight_step, bound))
+        search.reorder(weight)
+
+    return best
+
+
+# The state of an ARA* search shared by its passes: the best known cost (and parent) of
+#  every state code reached so far, the open list, and the best goal found.
+class AnytimeSearch:
+
+    def __init__(self, search_problem, heuristic_fn, encode, decode, weight):
+        self.search_problem = search_problem
+        self.heuristic_fn = heuristic_fn
+        self.encode = encode
+        self.decode = decode
+        self.weight = weight
+
+        self.cost = {}      # code -> best known cost
+        self.parents = {}   # code -> parent code, -1 for the start
+        self.h = {}         # code -> heuristic value, worked out once per state
+        self.open = set()   # codes on the open list
+        self.pq = []        # (g + w * h, -g, code); entries off the open list or with an old g are stale
+        self.closed = set()        # codes expanded in the current pass
+        self.inconsistent = set()  # codes whose cost went down after they were expanded this pass
+
+        self.goal = None    # code of the cheapest goal state found
+        self.goal_cost = None
+        self.nodes_visited = 0
+
+    # Record a new best cost for a state and put it on the open list, or set it aside
+    #  until the next pass if it was already expanded in this one. States no goal can be
+    #  reached from are recorded but never opened.
+    def add(self, code, state, cost, parent):
+        self.cost[code] = cost
+        self.parents[code] = parent
+        if code not in self.h:
+            self.h[code] = self.heuristic_fn(state)
+
+        if self.search_problem.goal_test(state) and (self.goal is None or cost < self.goal_cost):
+            self.goal = code
+            self.goal_cost = cost
+
+        if unreachable(self.h[code]):
+            return
+        if code in self.closed:
+            self.inconsistent.add(code)
+        else:
+            self.open.add(code)
+            heappush(self.pq, (cost + self.weight * self.h[code], -cost, code))
+
+    # One pass of weighted A*: expand states until none on the open list can lead to a
+    #  goal cheaper than the best one found. Returns False if the deadline passed first.
+    def improve_path(self, deadline):
+        search_problem = self.search_problem
+        encode = self.encode
+        cost_of = self.cost
+        pq = self.pq
+        open_codes = self.open
+
+        while len(pq) > 0:
+            priority, cost, code = pq[0]
+            cost = -cost
+            if code not in open_codes or cost_of[code] != cost:
+                heappop(pq)
+                continue
+            if self.goal is not None and self.goal_cost <= priority:
+                return True
+            if deadline is not None and perf_counter() > deadline:
+                return False
+
+            heappop(pq)
+            open_codes.remove(code)
+            self.closed.add(code)
+            self.nodes_visited += 1
+
+            for transition_cost, successor_state in search_problem.get_successors(self.decode(code)):
+                successor = encode(successor_state)
+                successor_cost = cost + transition_cost
+                if successor not in cost_of or successor_cost < cost_of[successor]:
+                    self.add(successor, successor_state, successor_cost, code)
+
+        return True
+
+    # Start a pass with a new weight: the inconsistent states go back on the open list,
+    #  and the open list is reordered by the new priorities
+    def reorder(self, weight):
+        self.weight = weight
+        self.open |= self.inconsistent
+        self.inconsistent = set()
+        self.closed = set()
+        self.pq = [(self.cost[code] + weight * self.h[code], -self.cost[code], code) for code in self.open]
+        heapify(self.pq)
+
+    # Suboptimality bound of the best goal: its cost over the lowest g + h of any state on
+    #  the open list or set aside, which no solution can beat. At most the current weight.
+    def bound(self):
+        lower = min((self.cost[code] + self.h[code] for code in self.open | self.inconsistent), default=None)
+        if lower is None or self.goal_cost <= lower:
+            return 1
+        if lower <= 0:
+            return self.weight
+        return min(self.weight, self.goal_cost / lower)
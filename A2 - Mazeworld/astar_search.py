@@ -1,81 +1,224 @@
 from SearchSolution import SearchSolution
+from BucketQueue import BucketQueue
+from Maze import UNREACHABLE
 from heapq import heappush, heappop
 
 
-class AstarNode:
-    # each search node except the root has a parent node
-    # and all search nodes wrap a state object
+# Problems without a state codec are searched over their states themselves
+def same_state(state):
+    return state
 
-    def __init__(self, state, heuristic, parent=None, transition_cost=0):
-        # you write this part
-        self.state = state
-        self.heuristic = heuristic
-        self.parent = parent
-        self.cost = transition_cost
 
-    def priority(self):
-        # you write this part
-        return self.heuristic + self.cost
+# Heuristic values of UNREACHABLE (or more) mark states no goal can be reached from, as
+# the distance heuristics give for a robot walled off from its goal. Every search here
+# leaves such states out of its open list instead of queueing them at f = 2**31.
+def unreachable(h):
+    return h >= UNREACHABLE
 
-    # comparison operator,
-    # needed for heappush and heappop to work with AstarNodes:
-    def __lt__(self, other):
-        return self.priority() < other.priority()
 
+# A* search. Problems with a state codec (encode/decode) are searched over integer codes:
+# the cost and parent maps are keyed by codes, and states are decoded just to be expanded.
+# The open list is a heapq heap by default, or a BucketQueue for problems that declare
+# integer_costs = True (all step costs and heuristic values are non-negative integers) when
+# the heuristic gives an integer for the start state. open_list can name another priority
+# queue class instead (see astar_open_list_search).
+#  A weight w other than 1 runs weighted A*, which orders the open list by g + w * h: it
+# expands far fewer nodes on hard problems, and with an admissible heuristic the solution
+# costs at most w times the optimal cost.
+def astar_search(search_problem, heuristic_fn, profiler=None, open_list=None, weight=1):
+    if profiler is not None:
+        profiler.start()
+        search_problem = profiler.attach(search_problem)
+        heuristic_fn = profiler.timed("heuristic", heuristic_fn)
 
-# take the current node, and follow its parents back
-#  as far as possible. Grab the states from the nodes,
-#  and reverse the resulting list of states.
-def backchain(node):
-    result = []
-    current = node
-    while current:
-        result.append(current.state)
-        current = current.parent
+    if weight != 1:
+        heuristic_fn = weighted_heuristic(heuristic_fn, weight)
 
-    result.reverse()
-    return result
+    if open_list is None:
+        if (getattr(search_problem, "integer_costs", False)
+                and isinstance(heuristic_fn(search_problem.start_state), int)):
+            solution = astar_bucket_search(search_problem, heuristic_fn, profiler)
+        else:
+            solution = astar_heap_search(search_problem, heuristic_fn, profiler)
+    else:
+        solution = astar_open_list_search(search_problem, heuristic_fn, open_list(), profiler)
 
+    return solution if profiler is None else profiler.finish(solution)
 
-def astar_search(search_problem, heuristic_fn):
-    # I'll get you started:
-    start_node = AstarNode(search_problem.start_state, heuristic_fn(search_problem.start_state))
-    pq = []
-    heappush(pq, start_node)
 
-    solution = SearchSolution(search_problem, "Astar with heuristic " + heuristic_fn.__name__)
+# heuristic_fn scaled by weight, named after it for the solution's search method;
+# UNREACHABLE stays UNREACHABLE whatever the weight
+def weighted_heuristic(heuristic_fn, weight):
+    def weighted_fn(state):
+        h = heuristic_fn(state)
+        return h if unreachable(h) else weight * h
+
+    weighted_fn.__name__ = str(weight) + " * " + heuristic_fn.__name__
+    return weighted_fn
+
 
-    visited_cost = {}
-    visited_cost[start_node.state] = 0
+# The heap holds (priority, -cost, code) tuples, which compare in C and break priority
+# ties toward the deeper node. Finding a cheaper path to a state pushes it again, and the
+# stale entry is skipped when it comes out. Unreachable states are never pushed.
+def astar_heap_search(search_problem, heuristic_fn, profiler=None):
+    encode = getattr(search_problem, "encode", same_state)
+    decode = getattr(search_problem, "decode", same_state)
+    start_state = search_problem.start_state
 
-    # you write the rest:
+    solution = SearchSolution(search_problem, "Astar with heuristic " + heuristic_fn.__name__)
+
+    start = encode(start_state)
+    visited_cost = {start: 0}
+    parents = {start: -1}
+    start_h = heuristic_fn(start_state)
+    pq = [] if unreachable(start_h) else [(start_h, 0, start)]
 
     # iterating through the nodes in the priority queue until it's empty
     while len(pq) > 0:
         solution.nodes_visited += 1
-        curr_node = heappop(pq)
-        curr_state = curr_node.state
+        priority, cost, code = heappop(pq)
+        cost = -cost
 
-        # skip current node if cost != cost of visiting its state - avoids revisiting
-        if visited_cost[curr_state] != curr_node.cost:
+        # skip stale entries that were superseded by a cheaper path to the same state
+        if visited_cost[code] != cost:
             continue
 
+        if profiler is not None:
+            profiler.expand(len(pq) + 1, len(visited_cost))
+
         # checks if current state meets goal criteria - if so, backchain to find solution path
-        if search_problem.goal_test(curr_state):
-            solution.path = backchain(curr_node)
-            solution.cost = visited_cost[curr_state]
+        state = decode(code)
+        if search_problem.goal_test(state):
+            solution.path = code_backchain(code, parents, decode)
+            solution.cost = cost
             return solution
 
         # iterate through successors to explore alternate paths
-        for successor in search_problem.get_successors(curr_state):
-            # create new node for each successor with associated cost and heuristic
-            s_node = AstarNode(successor[1], heuristic_fn(successor[1]), curr_node, successor[0] + visited_cost[curr_state])
-            s_state = s_node.state
+        for transition_cost, successor_state in search_problem.get_successors(state):
+            successor = encode(successor_state)
+            successor_cost = cost + transition_cost
 
             # add successor to priority queue if state hasn't been visited or if it represents lower cost path
-            if s_state not in visited_cost or s_node.cost < visited_cost[s_state]:
-                visited_cost[s_state] = s_node.cost
-                heappush(pq, s_node)
+            if successor not in visited_cost or successor_cost < visited_cost[successor]:
+                visited_cost[successor] = successor_cost
+                parents[successor] = code
+                h = heuristic_fn(successor_state)
+                if not unreachable(h):
+                    heappush(pq, (successor_cost + h, -successor_cost, successor))
+
+    return solution
+
+
+# The same search with a BucketQueue as the open list: one bucket per f-value, ties going
+# to the highest g, and O(1) pushes and pops. Stale entries are skipped as with the heap.
+# Leaving unreachable states out matters most here: a bucket queue has a bucket for every
+# f-value up to the largest one.
+def astar_bucket_search(search_problem, heuristic_fn, profiler=None):
+    encode = getattr(search_problem, "encode", same_state)
+    decode = getattr(search_problem, "decode", same_state)
+    start_state = search_problem.start_state
+
+    solution = SearchSolution(search_problem, "Astar with heuristic " + heuristic_fn.__name__)
+
+    start = encode(start_state)
+    visited_cost = {start: 0}
+    parents = {start: -1}
+    pq = BucketQueue()
+    push = pq.push
+    pop = pq.pop
+    start_h = heuristic_fn(start_state)
+    if not unreachable(start_h):
+        push((start, 0), start_h, start_h)
+
+    while len(pq) > 0:
+        solution.nodes_visited += 1
+        code, cost = pop()
+
+        if visited_cost[code] != cost:
+            continue
+
+        if profiler is not None:
+            profiler.expand(len(pq) + 1, len(visited_cost))
+
+        state = decode(code)
+        if search_problem.goal_test(state):
+            solution.path = code_backchain(code, parents, decode)
+            solution.cost = cost
+            return solution
+
+        for transition_cost, successor_state in search_problem.get_successors(state):
+            successor = encode(successor_state)
+            successor_cost = cost + transition_cost
+
+            if successor not in visited_cost or successor_cost < visited_cost[successor]:
+                visited_cost[successor] = successor_cost
+                parents[successor] = code
+                h = heuristic_fn(successor_state)
+                if not unreachable(h):
+                    push((successor, successor_cost), successor_cost + h, h)
 
     return solution
 
+
+# A* over a priority queue object with push(item, priority), which adds an item or lowers
+# the priority of one already in it, and pop(), which removes and returns the
+# (item, priority) with the lowest priority; for example an IndexedHeap. Every state is in
+# the open list at most once, so no stale entries are popped or kept around. Priorities
+# are (f, -g, insertion count) tuples: f ties go toward the deeper state, then first in,
+# first out. Unreachable states are left out, as in the searches above.
+#  A decrease-key heap written in Python does more work per operation than heapq does in
+# C, so this only pays off when the same states are reached again and again at lower
+# costs (inconsistent heuristics, widely varying step costs).
+def astar_open_list_search(search_problem, heuristic_fn, pq, profiler=None):
+    encode = getattr(search_problem, "encode", same_state)
+    decode = getattr(search_problem, "decode", same_state)
+    start_state = search_problem.start_state
+
+    solution = SearchSolution(search_problem, "Astar with heuristic " + heuristic_fn.__name__)
+
+    start = encode(start_state)
+    visited_cost = {start: 0}
+    parents = {start: -1}
+    start_h = heuristic_fn(start_state)
+    if not unreachable(start_h):
+        pq.push(start, (start_h, 0, 0))
+    pushes = 1
+
+    while len(pq) > 0:
+        solution.nodes_visited += 1
+        code = pq.pop()[0]
+        cost = visited_cost[code]
+
+        if profiler is not None:
+            profiler.expand(len(pq) + 1, len(visited_cost))
+
+        state = decode(code)
+        if search_problem.goal_test(state):
+            solution.path = code_backchain(code, parents, decode)
+            solution.cost = cost
+            return solution
+
+        for transition_cost, successor_state in search_problem.get_successors(state):
+            successor = encode(successor_state)
+            successor_cost = cost + transition_cost
+
+            if successor not in visited_cost or successor_cost < visited_cost[successor]:
+                visited_cost[successor] = successor_cost
+                parents[successor] = code
+                h = heuristic_fn(successor_state)
+                if not unreachable(h):
+                    pq.push(successor, (successor_cost + h, -successor_cost, pushes))
+                    pushes += 1
+
+    return solution
+
+
+# follow parent codes back from code to the start (-1) and decode the reversed chain
+def code_backchain(code, parents, decode):
+    result = []
+    while code != -1:
+        result.append(decode(code))
+        code = parents[code]
+
+    result.reverse()
+    return result
@@ -0,0 +1,143 @@
+from Maze import Maze
+from MazeworldProblem import MazeworldProblem
+from SensorlessProblem import SensorlessProblem
+from astar_search import astar_search
+from arastar_search import arastar_search
+from memory_bounded_search import idastar_search, smastar_search
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import json
+import signal
+import sys
+import time
+
+# Solves a batch of independent Mazeworld and sensorless problems in parallel, one
+#  problem per worker process. Each problem is described by a spec dict, e.g.
+#
+#    {"type": "mazeworld", "maze": "maze3.maz", "goals": [1, 4, 1, 3, 1, 2]}
+#    {"type": "sensorless", "maze": "maze1.maz", "heuristic": "possible_heuristic"}
+#
+#  with optional "name", "heuristic" (a method of the problem, or "null") and
+#  "search" keys. Summaries are streamed back in the order the problems finish:
+#
+#    for summary in solve_batch(specs, timeout=60):
+#        print(summary["name"], summary["status"], summary["cost"])
+#
+#  or from the command line, with the specs in a JSON list:
+#
+#    python batch_search.py specs.json --workers 64 --timeout 60
+
+
+# null heuristic, useful for testing astar search without heuristic (uniform cost search).
+def null_heuristic(state):
+    return 0
+
+
+SEARCHES = {
+    "astar": astar_search,
+    "arastar": arastar_search,
+    "idastar": idastar_search,
+    "smastar": smastar_search,
+}
+
+DEFAULT_HEURISTICS = {
+    "mazeworld": "manhattan_heuristic",
+    "sensorless": "possible_heuristic",
+}
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+# build the search problem described by a spec
+def build_problem(spec):
+    maze = Maze(spec["maze"])
+    if spec["type"] == "mazeworld":
+        return MazeworldProblem(maze, tuple(spec["goals"]))
+    if spec["type"] == "sensorless":
+        return SensorlessProblem(maze)
+    raise ValueError("unknown problem type: " + str(spec["type"]))
+
+
+def spec_name(spec, index):
+    return spec.get("name", "{} {} #{}".format(spec["type"], spec.get("maze", ""), index))
+
+
+def raise_timeout(signum, frame):
+    raise SearchTimeout()
+
+
+# Worker: solve one spec and return its summary. The per-problem timeout is enforced
+#  inside the worker with a real-time interval timer (where the platform has one), so
+#  a runaway search frees its process for the next problem instead of blocking it.
+def solve_spec(spec, name, timeout=None):
+    summary = {"name": name, "status": None, "search_method": None, "nodes_visited": 0,
+               "steps": 0, "cost": None, "elapsed": 0.0, "solution": None, "error": None}
+
+    use_timer = timeout is not None and hasattr(signal, "setitimer")
+    if use_timer:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+
+    start = time.perf_counter()
+    try:
+        try:
+            problem = build_problem(spec)
+            heuristic_name = spec.get("heuristic", DEFAULT_HEURISTICS[spec["type"]])
+            heuristic = null_heuristic if heuristic_name == "null" else getattr(problem, heuristic_name)
+            solution = SEARCHES[spec.get("search", "astar")](problem, heuristic)
+        finally:
+            if use_timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    # the timer can still go off between the search returning and the cancel above,
+    #  so the timeout is caught outside the block that cancels it
+    except SearchTimeout:
+        summary["status"] = "timeout"
+    except Exception as e:
+        summary["status"] = "error"
+        summary["error"] = repr(e)
+    else:
+        summary["status"] = "solved" if len(solution.path) > 0 else "no solution"
+        summary["search_method"] = solution.search_method
+        summary["nodes_visited"] = solution.nodes_visited
+        # steps along the path: a Mazeworld robot's turn is a step even when it waits,
+        #  so the cost (the moves actually made) can be lower
+        summary["steps"] = max(len(solution.path) - 1, 0)
+        summary["cost"] = solution.cost if len(solution.path) > 0 else None
+        summary["solution"] = solution
+    summary["elapsed"] = time.perf_counter() - start
+
+    return summary
+
+
+# Solve every spec across a pool of worker processes (os.cpu_count() by default),
+#  yielding each problem's summary as soon as it finishes
+def solve_batch(specs, max_workers=None, timeout=None):
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(solve_spec, spec, spec_name(spec, i), timeout)
+                   for i, spec in enumerate(specs)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a batch of Mazeworld and sensorless problems.")
+    parser.add_argument("specs", help="JSON file holding a list of problem specs")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per problem")
+    args = parser.parse_args(argv)
+
+    with open(args.specs) as f:
+        specs = json.load(f)
+
+    for summary in solve_batch(specs, args.workers, args.timeout):
+        summary.pop("solution")
+        print(json.dumps(summary), flush=True)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
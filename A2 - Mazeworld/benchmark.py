@@ -0,0 +1,248 @@
+from Maze import Maze, build_maze, UNREACHABLE
+from MazeworldProblem import MazeworldProblem
+from SensorlessProblem import SensorlessProblem
+from astar_search import astar_search
+from arastar_search import arastar_search
+from memory_bounded_search import idastar_search, smastar_search
+from cooperative_search import cooperative_search
+from cbs_search import cbs_search
+from batch_search import SearchTimeout, raise_timeout
+from IndexedHeap import IndexedHeap
+
+import argparse
+import json
+import os
+import random
+import signal
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Reproducible performance benchmark for the Mazeworld searches.
+#  Builds a fixed-seed family of random mazes of growing size, runs every search
+#  algorithm on each of them and records wall time, nodes visited and peak memory.
+#  The results can be saved as a baseline and later runs compared against it:
+#
+#    python benchmark.py --save baseline.json
+#    python benchmark.py --baseline baseline.json
+#
+#  A comparison exits with status 1 if any run got slower, visited more nodes or
+#  used more memory than the baseline allows.
+#
+#  Every run is stopped after --timeout seconds (where the platform has an interval
+#  timer), so a search that blows up on some instance is reported as timed out instead
+#  of holding up the rest of the benchmark.
+
+
+SEED = 76
+MAZE_SIZES = (6, 8, 10, 12, 16)
+SENSORLESS_SIZES = (3, 4, 5)
+WALL_PROB = 0.2
+MIN_TIME_DIFF = 0.005
+TIMEOUT = 30
+
+
+# null heuristic, useful for testing astar search without heuristic (uniform cost search).
+def null_heuristic(state):
+    return 0
+
+
+# Search algorithms to benchmark, by problem kind: name -> function(problem) -> SearchSolution
+MAZEWORLD_ALGORITHMS = {
+    "astar_null": lambda problem: astar_search(problem, null_heuristic),
+    "astar_manhattan": lambda problem: astar_search(problem, problem.manhattan_heuristic),
+    "astar_distance": lambda problem: astar_search(problem, problem.distance_heuristic),
+    "astar_manhattan_w2": lambda problem: astar_search(problem, problem.manhattan_heuristic, weight=2),
+    "astar_null_indexed": lambda problem: astar_search(problem, null_heuristic, open_list=IndexedHeap),
+    "arastar_distance": lambda problem: arastar_search(problem, problem.distance_heuristic),
+    "idastar_distance": lambda problem: idastar_search(problem, problem.distance_heuristic),
+    "smastar_distance": lambda problem: smastar_search(problem, problem.distance_heuristic),
+    "cooperative": cooperative_search,
+    "cbs": cbs_search,
+}
+
+SENSORLESS_ALGORITHMS = {
+    "astar_possible": lambda problem: astar_search(problem, problem.possible_heuristic),
+    "astar_localization": lambda problem: astar_search(problem, problem.localization_heuristic),
+    "arastar_localization": lambda problem: arastar_search(problem, problem.localization_heuristic),
+    "idastar_localization": lambda problem: idastar_search(problem, problem.localization_heuristic),
+    "smastar_localization": lambda problem: smastar_search(problem, problem.localization_heuristic),
+}
+
+
+# Build the benchmark instances into directory. Returns a list of
+#  (instance name, problem factory, algorithms) tuples; the factories build a fresh
+#  problem for every run so no run sees state left behind by another one.
+#  Every maze gets its own generator seeded from seed and its size, so an instance
+#  stays the same when sizes are added to or removed from the family. No sensorless
+#  plan can bring together locations in parts of the floor that aren't connected, so
+#  sensorless mazes are drawn again until their floor is connected.
+def build_instances(directory, seed=SEED, maze_sizes=MAZE_SIZES, sensorless_sizes=SENSORLESS_SIZES):
+    instances = []
+
+    for size in maze_sizes:
+        rng = random.Random(seed * 1000 + size)
+        filename = os.path.join(directory, "bench" + str(size) + "x" + str(size) + ".maz")
+        filename, num_robots, goals = build_maze(size, size, WALL_PROB, filename, 2, rng)
+        instances.append(("mazeworld " + str(size) + "x" + str(size),
+                          lambda filename=filename, goals=goals: MazeworldProblem(Maze(filename), goals),
+                          MAZEWORLD_ALGORITHMS))
+
+    for size in sensorless_sizes:
+        rng = random.Random(seed * 1000 + 500 + size)
+        filename = os.path.join(directory, "blind" + str(size) + "x" + str(size) + ".maz")
+        build_maze(size, size, WALL_PROB, filename, 1, rng)
+        while not floor_connected(Maze(filename)):
+            build_maze(size, size, WALL_PROB, filename, 1, rng)
+        instances.append(("sensorless " + str(size) + "x" + str(size),
+                          lambda filename=filename: SensorlessProblem(Maze(filename)),
+                          SENSORLESS_ALGORITHMS))
+
+    return instances
+
+
+# Is every floor cell of the maze reachable from every other one?
+def floor_connected(maze):
+    floor = [(x, y) for y in range(maze.height) for x in range(maze.width) if maze.is_floor(x, y)]
+    distances = maze.distance_map(*floor[0])
+    return all(distances[maze.index(x, y)] != UNREACHABLE for x, y in floor)
+
+
+# Run algorithm on problem, stopping it after timeout seconds (None for no limit).
+#  Returns the solution, or None if the run timed out (also if the timer went off
+#  just as the search returned, while it was being stopped).
+def run_with_timeout(algorithm, problem, timeout):
+    use_timer = timeout is not None and hasattr(signal, "setitimer")
+    if use_timer:
+        signal.signal(signal.SIGALRM, raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        try:
+            return algorithm(problem)
+        finally:
+            if use_timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except SearchTimeout:
+        return None
+
+
+# Run one algorithm on one problem: wall time from a plain run, peak memory from a
+#  second run under tracemalloc (which slows the search down too much to time it).
+#  A run that times out has no nodes, length, cost or peak memory.
+def measure(algorithm, make_problem, memory=True, timeout=TIMEOUT):
+    problem = make_problem()
+    start = time.perf_counter()
+    solution = run_with_timeout(algorithm, problem, timeout)
+    elapsed = time.perf_counter() - start
+
+    record = {
+        "time": elapsed,
+        "timed_out": solution is None,
+        "nodes": None if solution is None else solution.nodes_visited,
+        "length": None if solution is None else len(solution.path),
+        "cost": None if solution is None else solution.cost,
+        "peak_memory": None,
+    }
+
+    if memory and solution is not None:
+        problem = make_problem()
+        tracemalloc.start()
+        if run_with_timeout(algorithm, problem, timeout) is not None:
+            record["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return record
+
+
+def run_benchmarks(instances, memory=True, timeout=TIMEOUT):
+    results = []
+    for name, make_problem, algorithms in instances:
+        for algorithm_name, algorithm in algorithms.items():
+            record = measure(algorithm, make_problem, memory, timeout)
+            record["instance"] = name
+            record["algorithm"] = algorithm_name
+            results.append(record)
+            if record["timed_out"]:
+                print("{:<18s} {:<20s} {:>9.4f}s timed out".format(name, algorithm_name, record["time"]))
+            else:
+                print("{:<18s} {:<20s} {:>9.4f}s {:>9d} nodes  peak {}".format(
+                    name, algorithm_name, record["time"], record["nodes"], format_bytes(record["peak_memory"])))
+    return results
+
+
+# Compare results against a baseline. Nodes visited must not grow and solution costs
+#  must match (path lengths may differ, since waiting costs nothing); time and peak
+#  memory may grow by the given fraction, and times within MIN_TIME_DIFF of the
+#  baseline are treated as noise. A run that times out now but didn't in the baseline
+#  is a regression; one that timed out in the baseline has nothing to compare against.
+#  Returns a list of regression messages.
+def compare(results, baseline, tolerance=0.25):
+    expected = {(r["instance"], r["algorithm"]): r for r in baseline}
+    regressions = []
+
+    for record in results:
+        key = (record["instance"], record["algorithm"])
+        if key not in expected:
+            continue
+        old = expected[key]
+
+        if old.get("timed_out"):
+            continue
+        if record["timed_out"]:
+            regressions.append("{} / {}: timed out after {:.4f}s".format(key[0], key[1], record["time"]))
+            continue
+
+        if record["nodes"] > old["nodes"]:
+            regressions.append("{} / {}: nodes {} -> {}".format(key[0], key[1], old["nodes"], record["nodes"]))
+        if record["cost"] != old["cost"]:
+            regressions.append("{} / {}: cost {} -> {}".format(key[0], key[1], old["cost"], record["cost"]))
+        if record["time"] > max(old["time"] * (1 + tolerance), old["time"] + MIN_TIME_DIFF):
+            regressions.append("{} / {}: time {:.4f}s -> {:.4f}s".format(key[0], key[1], old["time"], record["time"]))
+        if (record["peak_memory"] is not None and old["peak_memory"] is not None
+                and record["peak_memory"] > old["peak_memory"] * (1 + tolerance)):
+            regressions.append("{} / {}: peak memory {} -> {}".format(
+                key[0], key[1], format_bytes(old["peak_memory"]), format_bytes(record["peak_memory"])))
+
+    return regressions
+
+
+def format_bytes(num_bytes):
+    if num_bytes is None:
+        return "-"
+    return "{:.1f} KB".format(num_bytes / 1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Mazeworld searches.")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare the results against this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed fractional growth in time and memory (default 0.25)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    parser.add_argument("--timeout", type=float, default=TIMEOUT,
+                        help="seconds allowed per run (default {})".format(TIMEOUT))
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = run_benchmarks(build_instances(directory, args.seed), not args.no_memory, args.timeout)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for message in regressions:
+            print("REGRESSION " + message)
+        if regressions:
+            return 1
+        print("no regressions against " + args.baseline)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
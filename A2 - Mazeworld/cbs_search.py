@@ -0,0 +1,343 @@
+from SearchSolution import SearchSolution
+from astar_search import astar_search, unreachable
+from cooperative_search import build_joint_path, MAX_GROUP
+from heapq import heappush, heappop
+
+# Conflict-Based Search (CBS) for Mazeworld problems.
+#  Finds a least-cost plan for all robots without searching the joint state space. The
+#  high level searches a tree of constraints, best-first by total cost. Every node of
+#  the tree holds each robot's constraints, like "robot may not be on cell at the start
+#  of round t", plus each robot's cheapest path that respects its constraints. If two of
+#  those paths collide, the node is split in two, forbidding the collision once for
+#  each of the two robots, and only those robots are replanned. The low level plans one
+#  robot at a time with astar_search on a ConstrainedRobotProblem.
+#
+#  Rounds follow MazeworldProblem's turns: in round t every robot, in index order, moves
+#  or waits. So besides two robots on one cell, a robot moving onto a cell that a
+#  higher-numbered robot hasn't left yet is a collision too.
+#
+#  The total cost CBS minimizes is the number of rounds each robot takes to be done on
+#  its goal, summed over the robots, with a wait costing a round like a move. With
+#  MazeworldProblem's free waits a collision could be put off one round at a time
+#  forever at no extra cost, and CBS would never get through the plans of one cost. The
+#  result is a SearchSolution holding MazeworldProblem states, like a path from
+#  astar_search, with its cost counted in moves as usual, the low-level expansions in
+#  nodes_visited and the constraint tree nodes expanded in high_level_nodes.
+#
+#  A robot running into another robot that already sits on its goal is split into "the
+#  robot is never on that cell again" and "the other robot only gets to its goal later",
+#  rather than into one child per round the robot could wait.
+#
+#  Different orders of splitting can lead to the same constraints, so a node whose
+#  constraints were already generated is dropped.
+#
+#  CBS can still keep splitting forever on a problem that has no solution even though
+#  every robot can reach its goal alone (two robots that would have to pass each other in
+#  a dead end, say), and it gets slow when robots crowd a small maze or have crossing
+#  routes with lots of equally short alternatives. So it stops after node_limit
+#  constraint tree nodes (None for no limit). A problem with at most MAX_GROUP robots
+#  is then small enough to solve with astar_search on the joint problem instead; that
+#  solution has the fewest moves rather than the fewest rounds, which its search method
+#  says. With more robots the search fails, with the nodes it expanded counted in the
+#  solution.
+
+
+# Kinds of constraint on a robot, each given as (x, y, t, kind):
+VERTEX = "vertex"  # not on (x, y) at the start of round t
+FROM = "from"      # not on (x, y) at the start of round t or of any later round
+LATE = "late"      # not done on its goal (x, y) before round t + 1
+
+# collisions tried when looking for the best one to split a constraint tree node on
+CONFLICTS_TRIED = 4
+
+# default number of constraint tree nodes expanded before giving up (or falling back to
+#  joint A*, for few robots)
+NODE_LIMIT = 1000
+
+
+# One robot on its own, with states (x, y, t): the robot's cell at the start of round t.
+#  Beyond the last constrained round the maze doesn't change any more, so those rounds
+#  are merged into one and the state space stays finite.
+#  Among equally short trajectories, the one running into the other robots' current
+#  trajectories (hazards) the fewest times is preferred. Otherwise CBS keeps splitting
+#  on the same collision while the robot swaps between equally short detours, which a
+#  maze with few walls is full of. So a round costs round_cost, plus 1 if it ends on a
+#  hazard; round_cost is more than the number of rounds on any path it can find.
+class ConstrainedRobotProblem:
+
+    def __init__(self, maze, start, goal, goal_distance, constraints, hazards=frozenset(), parked=None):
+        if parked is None:
+            parked = {}
+        self.maze = maze
+        self.goal = goal
+        self.goal_distance = goal_distance
+        self.start_state = (start[0], start[1], 0)
+        self.num_constraints = len(constraints)
+        self.hazards = hazards  # (x, y, t) on which the robot would run into another robot
+        self.parked = parked    # (x, y) -> first round from which another robot is in the way there
+
+        self.forbidden = set()    # (x, y, t) the robot may not be on
+        self.forbidden_from = {}  # (x, y) -> first round from which the robot may not be on it
+        self.goal_round = 0       # first round from which the robot may stay on its goal
+        self.last_round = 0
+        for x, y, t, kind in constraints:
+            if kind == FROM:
+                self.forbidden_from[(x, y)] = min(t, self.forbidden_from.get((x, y), t))
+            else:
+                if kind == VERTEX:
+                    self.forbidden.add((x, y, t))
+                if (x, y) == goal:
+                    self.goal_round = max(self.goal_round, t + 1)
+            self.last_round = max(self.last_round, t)
+        self.last_round = max(self.last_round, max((t for x, y, t in hazards), default=0),
+                              max(parked.values(), default=0))
+        self.round_cost = maze.width * maze.height * (self.last_round + 2) + 1
+
+    def __str__(self):
+        return "Constrained robot problem: " + str(self.num_constraints) + " constraints"
+
+    # Waiting, then moving east, west, north, and south
+    def get_successors(self, state):
+        x, y, t = state
+        next_round = min(t + 1, self.last_round + 1)
+        successors = []
+        for new_x, new_y in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if (self.maze.is_floor(new_x, new_y) and (new_x, new_y, t + 1) not in self.forbidden
+                    and self.forbidden_from.get((new_x, new_y), t + 2) > t + 1):
+                hazard = (new_x, new_y, t + 1) in self.hazards or self.parked.get((new_x, new_y), t + 2) <= t + 1
+                successors.append((self.round_cost + hazard, (new_x, new_y, next_round)))
+        return successors
+
+    def goal_test(self, state):
+        return ((state[0], state[1]) == self.goal and state[2] >= self.goal_round
+                and self.goal not in self.forbidden_from)
+
+    # true distance to the goal in rounds, ignoring the constraints
+    def distance_heuristic(self, state):
+        return self.goal_distance[self.maze.index(state[0], state[1])] * self.round_cost
+
+    # State codec: the round in the high digits, then the cell
+    def encode(self, state):
+        return (state[2] * self.maze.height + state[1]) * self.maze.width + state[0]
+
+    def decode(self, code):
+        cell = code % (self.maze.width * self.maze.height)
+        return cell % self.maze.width, cell // self.maze.width, code // (self.maze.width * self.maze.height)
+
+
+# A node of the constraint tree: each robot's constraints and its path under them
+class ConstraintNode:
+    __slots__ = ("constraints", "trajectories", "costs", "cost", "conflicts")
+
+    def __init__(self, constraints, trajectories, costs):
+        self.constraints = constraints    # per robot, a frozenset of (x, y, t, kind)
+        self.trajectories = trajectories  # per robot, its cell at the start of every round
+        self.costs = costs                # per robot, the rounds it takes
+        self.cost = sum(costs)
+        self.conflicts = find_conflicts(trajectories)
+
+
+def cbs_search(search_problem, node_limit=NODE_LIMIT):
+    solution = SearchSolution(search_problem, "Conflict-Based Search")
+    num_robots = search_problem.total_robots
+    maze = search_problem.maze
+    starts = [(search_problem.start_state[2 * i + 1], search_problem.start_state[2 * i + 2])
+              for i in range(num_robots)]
+    goals = [(search_problem.goal_locations[2 * i], search_problem.goal_locations[2 * i + 1])
+             for i in range(num_robots)]
+
+    # two robots can't share a goal, and every robot must be able to reach its own
+    if len(set(goals)) < num_robots:
+        return solution
+    for robot in range(num_robots):
+        if unreachable(search_problem.goal_distance_map(robot)[maze.index(*starts[robot])]):
+            return solution
+
+    trajectories = [None] * num_robots
+    costs = [None] * num_robots
+    for robot in range(num_robots):
+        trajectories[robot], costs[robot] = plan_robot(search_problem, robot, starts, goals, frozenset(),
+                                                       trajectories, solution)
+
+    # Nodes of equal cost are taken fewest collisions first, then in insertion order, so
+    #  the nodes themselves are never compared
+    pq = []
+    count = 0
+    root = ConstraintNode([frozenset()] * num_robots, trajectories, costs)
+    heappush(pq, (root.cost, len(root.conflicts), count, root))
+    generated = {tuple(root.constraints)}
+
+    while len(pq) > 0:
+        if node_limit is not None and solution.high_level_nodes >= node_limit:
+            if num_robots <= MAX_GROUP:
+                return joint_fallback(search_problem, solution)
+            return solution
+        node = heappop(pq)[3]
+        solution.high_level_nodes += 1
+
+        if len(node.conflicts) == 0:
+            solution.path = build_joint_path(search_problem, node.trajectories)
+            solution.cost = sum(1 for i in range(1, len(solution.path))
+                                if solution.path[i][1:] != solution.path[i - 1][1:])
+            return solution
+
+        for child in split_node(search_problem, node, starts, goals, solution):
+            # a bypass that clears every collision comes back with the node's own constraints
+            key = tuple(child.constraints)
+            if key in generated and child.constraints is not node.constraints:
+                continue
+            generated.add(key)
+            count += 1
+            heappush(pq, (child.cost, len(child.conflicts), count, child))
+
+    return solution
+
+
+# Solve the problem with astar_search over the joint state space instead, counting the
+#  nodes CBS visited too. Its cost is the fewest moves, not the fewest rounds.
+def joint_fallback(search_problem, solution):
+    result = astar_search(search_problem, search_problem.distance_heuristic)
+    result.search_method = (solution.search_method + " (node limit reached), then "
+                            + result.search_method + " for the fewest moves")
+    result.nodes_visited += solution.nodes_visited
+    result.high_level_nodes = solution.high_level_nodes
+    return result
+
+
+# Split a node on one of its collisions, into one child per robot in it, each forbidding
+#  that robot's part in it. Of the first CONFLICTS_TRIED collisions, one whose children
+#  both cost more than the node (or can't be planned) is taken first, then one with at
+#  least one such child, then the earliest; splitting on those raises the cost bound
+#  fastest. A child that costs no more than the node but collides less is just a better
+#  plan under the node's own constraints, so it replaces the node's plan instead (a
+#  bypass) and the node is split again.
+def split_node(search_problem, node, starts, goals, solution):
+    while len(node.conflicts) > 0:
+        best_rank = -1
+        best_children = None
+        bypass = None
+        for conflict in node.conflicts[:CONFLICTS_TRIED]:
+            children = [constrained_child(search_problem, node, robot, constraint, starts, goals, solution)
+                        for robot, constraint in split_conflict(node.trajectories, *conflict)]
+
+            for child in children:
+                if child is not None and child.cost == node.cost and len(child.conflicts) < len(node.conflicts):
+                    bypass = child
+            if bypass is not None:
+                break
+
+            rank = sum(1 for child in children if child is None or child.cost > node.cost)
+            if rank > best_rank:
+                best_rank = rank
+                best_children = children
+            if rank == 2:
+                break
+
+        if bypass is None:
+            return [child for child in best_children if child is not None]
+        node = ConstraintNode(node.constraints, bypass.trajectories, bypass.costs)
+
+    return [node]
+
+
+# The node with one more constraint on robot, and robot replanned under its constraints
+#  (None if it can't be)
+def constrained_child(search_problem, node, robot, constraint, starts, goals, solution):
+    constraints = node.constraints[:]
+    constraints[robot] = constraints[robot] | {constraint}
+    trajectory, cost = plan_robot(search_problem, robot, starts, goals, constraints[robot],
+                                  node.trajectories, solution)
+    if trajectory is None:
+        return None
+
+    trajectories = node.trajectories[:]
+    trajectories[robot] = trajectory
+    costs = node.costs[:]
+    costs[robot] = cost
+    return ConstraintNode(constraints, trajectories, costs)
+
+
+# Low level: the robot's cheapest trajectory under its constraints with astar_search,
+#  keeping clear of the other robots' trajectories where it can, and its cost in rounds
+#  (None, None if there is none)
+def plan_robot(search_problem, robot, starts, goals, constraints, trajectories, solution):
+    if starts[robot] + (0, VERTEX) in constraints:
+        return None, None
+
+    hazards, parked = robot_hazards(trajectories, robot)
+    problem = ConstrainedRobotProblem(search_problem.maze, starts[robot], goals[robot],
+                                      search_problem.goal_distance_map(robot), constraints, hazards, parked)
+    result = astar_search(problem, problem.distance_heuristic)
+    solution.nodes_visited += result.nodes_visited
+    if len(result.path) == 0:
+        return None, None
+
+    return [(x, y) for x, y, t in result.path], result.cost // problem.round_cost
+
+
+# Where robot would collide with the other (planned) robots' trajectories: the (x, y, t)
+#  it can't be on at the start of round t, and the cells it can't be on from some round
+#  on because a robot is done there. Besides the cells the others are on, that is the
+#  cells a higher-numbered robot is on a round earlier (it hasn't left yet when robot
+#  moves in) and a lower-numbered robot is on a round later (it moves in before robot
+#  has left).
+def robot_hazards(trajectories, robot):
+    hazards = set()
+    parked = {}
+    for other, trajectory in enumerate(trajectories):
+        if other == robot or trajectory is None:
+            continue
+        shift = 1 if other > robot else -1
+        for t, (x, y) in enumerate(trajectory):
+            hazards.add((x, y, t))
+            hazards.add((x, y, t + shift))
+        parked[trajectory[-1]] = max(len(trajectory) - 1 + min(shift, 0), 0)
+    return hazards, parked
+
+
+# The collisions between the trajectories, the first one for each pair of robots in
+#  order of time, as (robot, other, cell, t, other_t): robot on cell at the start of
+#  round t while other is on it at the start of round other_t. Robots stay on their last
+#  cells, their goals, once their trajectories end.
+def find_conflicts(trajectories):
+    num_robots = len(trajectories)
+    rounds = max(len(trajectory) for trajectory in trajectories)
+    conflicts = []
+    pairs = set()
+
+    def at(robot, t):
+        trajectory = trajectories[robot]
+        return trajectory[min(t, len(trajectory) - 1)]
+
+    for t in range(rounds):
+        cells = {}
+        for robot in range(num_robots):
+            cell = at(robot, t)
+            if cell in cells and (cells[cell], robot) not in pairs:
+                pairs.add((cells[cell], robot))
+                conflicts.append((cells[cell], robot, cell, t, t))
+            cells[cell] = robot
+
+        # within round t a robot moving onto a cell that a higher-numbered robot has not
+        #  left yet
+        for robot in range(num_robots):
+            cell = at(robot, t + 1)
+            other = cells.get(cell)
+            if other is not None and other > robot and (robot, other) not in pairs:
+                pairs.add((robot, other))
+                conflicts.append((robot, other, cell, t + 1, t))
+
+    return conflicts
+
+
+# The two (robot, (x, y, t, kind)) constraints that each rule out a collision: either
+#  robot is not on the cell at the start of round t, or other is not on it at the start
+#  of round other_t. If either robot is already done on its goal by then, the other one
+#  has to keep off the cell for good or it has to finish later instead.
+def split_conflict(trajectories, robot, other, cell, t, other_t):
+    x, y = cell
+    if len(trajectories[other]) - 1 <= other_t:
+        return (robot, (x, y, t, FROM)), (other, (x, y, t, LATE))
+    if len(trajectories[robot]) - 1 <= t:
+        return (other, (x, y, other_t, FROM)), (robot, (x, y, t, LATE))
+    return (robot, (x, y, t, VERTEX)), (other, (x, y, other_t, VERTEX))
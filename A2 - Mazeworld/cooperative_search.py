@@ -0,0 +1,292 @@
+from MazeworldProblem import MazeworldProblem
+from SearchSolution import SearchSolution
+from astar_search import astar_search, unreachable
+from heapq import heappush, heappop
+import copy
+
+# Cooperative A* for Mazeworld problems with many robots.
+#  Instead of searching the joint state space (which grows exponentially with the
+#  number of robots), robots are planned one after another, each with A* over
+#  (x, y, t). Every planned robot's cells are recorded in a space-time reservation
+#  table that later robots have to avoid. A robot that can't get around the
+#  reservations is grouped with the robots blocking it, and that small group is
+#  planned jointly with astar_search; groups grow until their joint plan is clear of
+#  everyone else's. If a group would get bigger than MAX_GROUP, the blocked robot is
+#  moved to the front of the planning order and planning starts over instead.
+#
+#  Time is counted in rounds: in round t every robot, in index order, makes one move
+#  (or waits), which is exactly how MazeworldProblem takes turns. The result is a
+#  SearchSolution whose path is a list of MazeworldProblem states, so it can be passed
+#  to animate_path like a path from astar_search.
+#
+#  Robots are planned greedily, so the plan is usually good but not guaranteed optimal.
+
+
+# largest group of robots planned jointly
+MAX_GROUP = 3
+
+
+# Space-time reservations of the robots planned so far. A trajectory lists a robot's
+#  cell at the start of every round; once it ends, the robot stays on its last cell.
+class ReservationTable:
+
+    def __init__(self, starts):
+        self.cells = {0: {}}  # round -> {cell: robot on it at the start of that round}
+        self.permanent = {}   # cell -> (round, robot) for a finished robot sitting on it
+        self.horizon = 0      # last round with a time-dependent reservation
+
+        # robots not planned yet are still on their start cells in the first round
+        for robot, cell in enumerate(starts):
+            self.cells[0][cell] = robot
+
+    def add(self, robot, trajectory):
+        for t, cell in enumerate(trajectory):
+            self.cells.setdefault(t, {})[cell] = robot
+        self.permanent[trajectory[-1]] = (len(trajectory) - 1, robot)
+        self.horizon = max(self.horizon, len(trajectory) - 1)
+
+    # the robot on cell at the start of round t, or None
+    def occupant(self, cell, t):
+        robot = self.cells.get(t, {}).get(cell)
+        if robot is None and cell in self.permanent and self.permanent[cell][0] <= t:
+            robot = self.permanent[cell][1]
+        return robot
+
+    # Can robot be on cell at the start of round t? Robots move in index order within a
+    #  round, so a lower-numbered robot must not move onto the cell in round t before
+    #  this robot leaves it, and this robot must not have moved onto it in round t - 1
+    #  before a higher-numbered robot left it.
+    def is_free(self, cell, t, robot):
+        now = self.occupant(cell, t)
+        if now is not None and now != robot:
+            return False
+        before = self.occupant(cell, t + 1)
+        if before is not None and before < robot:
+            return False
+        after = self.occupant(cell, t - 1) if t > 0 else None
+        return after is None or after <= robot
+
+    # Can a robot that reaches cell at round t stay there for good?
+    def can_stay(self, cell, t):
+        if cell in self.permanent:
+            return False
+        for later in range(t, self.horizon + 1):
+            if cell in self.cells.get(later, ()):
+                return False
+        return True
+
+
+def cooperative_search(search_problem):
+    solution = SearchSolution(search_problem, "Cooperative A*")
+    num_robots = search_problem.total_robots
+    starts = [(search_problem.start_state[2 * i + 1], search_problem.start_state[2 * i + 2])
+              for i in range(num_robots)]
+    goals = [(search_problem.goal_locations[2 * i], search_problem.goal_locations[2 * i + 1])
+             for i in range(num_robots)]
+
+    order = list(range(num_robots))
+    for attempt in range(num_robots + 1):
+        trajectories, blocked = plan_in_order(search_problem, order, starts, goals, solution)
+        if trajectories is not None:
+            solution.path = build_joint_path(search_problem, [trajectories[r] for r in range(num_robots)])
+            solution.cost = sum(1 for i in range(1, len(solution.path))
+                                if solution.path[i][1:] != solution.path[i - 1][1:])
+            return solution
+        if blocked is None or order[0] == blocked:
+            break
+
+        # give the robot that got stuck the first pick and start over
+        order.remove(blocked)
+        order.insert(0, blocked)
+
+    return solution
+
+
+# Plan the robots in the given priority order. Returns ({robot: trajectory}, None) on
+#  success, or (None, robot) naming the robot that could not be planned (None, None if
+#  the problem can't be solved at all).
+def plan_in_order(search_problem, order, starts, goals, solution):
+    maze = search_problem.maze
+    table = ReservationTable(starts)
+    trajectories = {}  # robot -> list of its cells at the start of every round
+    group_of = {}      # robot -> the group (tuple of robots) it was planned with
+
+    for robot in order:
+        trajectory, expanded = space_time_astar(maze, robot, starts[robot], goals[robot],
+                                                search_problem.goal_distance_map(robot), table)
+        solution.nodes_visited += expanded
+
+        if trajectory is not None:
+            trajectories[robot] = trajectory
+            group_of[robot] = (robot,)
+            table.add(robot, trajectory)
+            continue
+
+        # Blocked: plan the robot jointly with whoever is in its way, growing the group
+        #  until its plan no longer conflicts with the robots outside it
+        blockers, expanded = blocking_robots(maze, robot, starts[robot], goals[robot],
+                                             search_problem.goal_distance_map(robot), trajectories)
+        solution.nodes_visited += expanded
+        if blockers is None:
+            return None, None
+
+        group = {robot} | blockers
+        while True:
+            group = set(r for member in group for r in group_of.get(member, (member,)))
+            if len(group) > MAX_GROUP:
+                return None, robot
+
+            group_paths, expanded = joint_astar(search_problem, sorted(group), starts, goals)
+            solution.nodes_visited += expanded
+            if group_paths is None:
+                return None, None
+
+            conflicting = set(other for other in trajectories if other not in group and
+                              any(in_conflict(group_paths[r], r, trajectories[other], other)
+                                  for r in group))
+            if not conflicting:
+                break
+            group |= conflicting
+
+        members = tuple(sorted(group))
+        for r in members:
+            trajectories[r] = group_paths[r]
+            group_of[r] = members
+
+        # the group members' old reservations are stale now
+        table = ReservationTable(starts)
+        for r, trajectory in trajectories.items():
+            table.add(r, trajectory)
+
+    return trajectories, None
+
+
+# A* over (x, y, round) for one robot, avoiding the reserved cells. Every round costs
+#  1 whether the robot moves or waits, and the robot's true distance to its goal is the
+#  heuristic. Beyond the last reserved round the maze no longer changes, so rounds past
+#  it are merged and the search is finite. Returns the trajectory (or None) and the
+#  number of nodes expanded.
+def space_time_astar(maze, robot, start, goal, goal_distance, table):
+    if not table.is_free(start, 0, robot) or unreachable(goal_distance[maze.index(*start)]):
+        return None, 0
+
+    last_round = table.horizon + 1
+    pq = [(goal_distance[maze.index(*start)], 0, start)]
+    parents = {(start, 0): None}
+    expanded = 0
+
+    while pq:
+        priority, t, cell = heappop(pq)
+        expanded += 1
+
+        if cell == goal and table.can_stay(cell, t):
+            return space_time_backchain(parents, cell, t, last_round), expanded
+
+        x, y = cell
+        for new_cell in ((x, y), (x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if not maze.is_floor(*new_cell) or not table.is_free(new_cell, t + 1, robot):
+                continue
+            key = (new_cell, min(t + 1, last_round))
+            if key in parents:
+                continue
+            parents[key] = (cell, min(t, last_round))
+            heappush(pq, (t + 1 + goal_distance[maze.index(*new_cell)], t + 1, new_cell))
+
+    return None, expanded
+
+
+# follow (cell, round) parents back to the start; there is one link per round, also
+#  past last_round where the round numbers were merged
+def space_time_backchain(parents, cell, t, last_round):
+    trajectory = []
+    key = (cell, min(t, last_round))
+    while key is not None:
+        trajectory.append(key[0])
+        key = parents[key]
+    trajectory.reverse()
+    return trajectory
+
+
+# Robots in the way: of the robots whose trajectories collide with robot's best
+#  trajectory when everyone else is ignored, the ones it runs into first (all planned
+#  robots if, oddly, none of them collide). The group grows later if that isn't enough.
+#  Returns None if the robot can't reach its goal even on an empty maze.
+def blocking_robots(maze, robot, start, goal, goal_distance, trajectories):
+    alone, expanded = space_time_astar(maze, robot, start, goal, goal_distance, ReservationTable(()))
+    if alone is None:
+        return None, expanded
+
+    first_conflict = {}
+    for other, trajectory in trajectories.items():
+        t = conflict_round(alone, robot, trajectory, other)
+        if t is not None:
+            first_conflict[other] = t
+
+    if not first_conflict:
+        return set(trajectories), expanded
+    earliest = min(first_conflict.values())
+    return set(other for other, t in first_conflict.items() if t == earliest), expanded
+
+
+# Plan a group of robots jointly with astar_search on a copy of the maze holding only
+#  them. Returns {robot: trajectory} (or None if they can't all reach their goals) and
+#  the number of nodes visited.
+def joint_astar(search_problem, group, starts, goals):
+    maze = copy.copy(search_problem.maze)
+    maze.robotloc = [c for r in group for c in starts[r]]
+    problem = MazeworldProblem(maze, tuple(c for r in group for c in goals[r]))
+
+    result = astar_search(problem, problem.distance_heuristic)
+    if len(result.path) == 0:
+        return None, result.nodes_visited
+
+    # every len(group) moves make one round; a final partial round ends with the goal
+    rounds = result.path[::len(group)]
+    if (len(result.path) - 1) % len(group) != 0:
+        rounds.append(result.path[-1])
+
+    paths = {}
+    for i, r in enumerate(group):
+        paths[r] = [(state[2 * i + 1], state[2 * i + 2]) for state in rounds]
+    return paths, result.nodes_visited
+
+
+# First round in which two robots' trajectories collide (None if they never do). The
+#  lower-numbered robot moves first within a round.
+def conflict_round(trajectory, robot, other_trajectory, other):
+    if other < robot:
+        trajectory, other_trajectory = other_trajectory, trajectory
+
+    def at(path, t):
+        return path[min(t, len(path) - 1)]
+
+    for t in range(max(len(trajectory), len(other_trajectory))):
+        # same cell at the start of a round, or the first moving onto the second's cell
+        #  before the second has moved away
+        if at(trajectory, t) == at(other_trajectory, t) or at(trajectory, t + 1) == at(other_trajectory, t):
+            return t
+    return None
+
+
+def in_conflict(trajectory, robot, other_trajectory, other):
+    return conflict_round(trajectory, robot, other_trajectory, other) is not None
+
+
+# Interleave per-robot trajectories into MazeworldProblem states, one robot moving
+#  per state, stopping at the first goal state
+def build_joint_path(search_problem, trajectories):
+    num_robots = len(trajectories)
+    positions = [c for trajectory in trajectories for c in trajectory[0]]
+    path = [tuple([0] + positions)]
+    rounds = max(len(trajectory) for trajectory in trajectories)
+
+    for t in range(1, rounds):
+        for robot in range(num_robots):
+            if search_problem.goal_test(path[-1]):
+                return path
+            x, y = trajectories[robot][min(t, len(trajectories[robot]) - 1)]
+            positions[2 * robot] = x
+            positions[2 * robot + 1] = y
+            path.append(tuple([(robot + 1) % num_robots] + positions))
+
+    return path
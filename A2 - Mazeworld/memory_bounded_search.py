@@ -0,0 +1,350 @@
+from SearchSolution import SearchSolution
+from astar_search import same_state, unreachable
+from heapq import heapify, heappush, heappop
+from array import array
+
+# Memory-bounded alternatives to astar_search, for problems (four or more robots on a
+#  big maze) whose open list and cost map would not fit in memory. Both take the same
+#  search_problem and heuristic_fn as astar_search and return a SearchSolution, and both
+#  find optimal solutions when the heuristic is admissible:
+#
+#  idastar_search: iterative deepening A*. Depth-first searches bounded by an f-cost
+#   threshold, raised after every iteration to the lowest f that went over it. Memory
+#   is the current path plus a transposition table of table_size entries.
+#  smastar_search: simplified memory-bounded A*. Best-first like A*, but keeps at most
+#   max_nodes nodes; when it runs out, it forgets the worst leaf and remembers its
+#   f-value in the leaf's parent, so that branch is regenerated only if it turns out
+#   to be the best again.
+
+
+# entries in the IDA* and SMA* transposition tables
+TABLE_SIZE = 1 << 20
+
+# smallest IDA* table allowed: with fewer slots, collisions leave so little pruning
+#  that IDA* searches the same subtrees over and over
+MIN_TABLE_SIZE = 1 << 10
+
+# default node budget for SMA*
+MAX_NODES = 100000
+
+
+# IDA* with an explicit stack instead of recursion. States already on the current path
+#  are skipped (Mazeworld waits cost 0, so cycles don't raise f). The transposition
+#  table keeps, for table_size hash slots, the cheapest cost at which a state was
+#  reached in the current iteration; a state reached again at no lower cost has had
+#  its subtree searched already and is pruned. Slots are overwritten on collisions, so
+#  the table never grows. It is allocated once, in arrays: states are kept by their
+#  64-bit hash (two states with the same hash would be taken for one, which is as
+#  unlikely as a chess transposition table's key collisions), and a slot belongs to the
+#  current iteration only if it is stamped with the iteration's number, so starting an
+#  iteration just means counting up.
+#  States generated beyond the threshold go in the table too, with their f-value. The
+#  next threshold is the lowest f-value among them that no cheaper path reached within
+#  the threshold; if there is none, a higher threshold would generate no new state, so
+#  the problem has no solution and the search stops. (If the table lost one of them to
+#  a collision, the lowest f-value over the threshold is used instead.)
+def idastar_search(search_problem, heuristic_fn, table_size=TABLE_SIZE):
+    encode = getattr(search_problem, "encode", same_state)
+    start_state = search_problem.start_state
+    solution = SearchSolution(search_problem, "IDA* with heuristic " + heuristic_fn.__name__)
+
+    if table_size < MIN_TABLE_SIZE:
+        raise ValueError("IDA* table_size must be at least " + str(MIN_TABLE_SIZE))
+
+    threshold = heuristic_fn(start_state)
+    if unreachable(threshold):
+        return solution
+
+    table_keys = array('q', bytes(8 * table_size))    # hash of the state in the slot
+    table_stamps = array('q', bytes(8 * table_size))  # iteration that wrote the slot, 0 for none
+    table_costs = array('d', bytes(8 * table_size))
+    # f-value of a state generated beyond the threshold, -1 for one within it
+    table_beyond = array('d', bytes(8 * table_size))
+    iteration = 0
+
+    while threshold is not None:
+        iteration += 1
+        beyond_slots = []  # slots that took a state beyond the threshold
+        lowest_beyond = None
+        lost = False
+
+        # one frame per state on the current path: its state, code, cost and successors
+        # (None until it is expanded) with the index of the next one to try
+        states = [start_state]
+        codes = [encode(start_state)]
+        costs = [0]
+        successors = [None]
+        next_index = [0]
+        on_path = {codes[0]}
+
+        while len(states) > 0:
+            top = len(states) - 1
+            if successors[top] is None:
+                if search_problem.goal_test(states[top]):
+                    solution.path = states
+                    solution.cost = costs[top]
+                    return solution
+                solution.nodes_visited += 1
+                successors[top] = search_problem.get_successors(states[top])
+
+            # find the next successor within the threshold and push it
+            cost = costs[top]
+            successor_list = successors[top]
+            pushed = False
+            while next_index[top] < len(successor_list):
+                transition_cost, successor_state = successor_list[next_index[top]]
+                next_index[top] += 1
+
+                successor = encode(successor_state)
+                if successor in on_path:
+                    continue
+                successor_cost = cost + transition_cost
+                h = heuristic_fn(successor_state)
+                if unreachable(h):
+                    continue
+
+                # an integer code hashes to itself, and its low bits alone would put states
+                # that differ only in whose turn it is in the same slot; a tuple mixes all bits
+                key = hash((successor,))
+                slot = key % table_size
+                current = table_stamps[slot] == iteration
+                if current and table_keys[slot] == key and table_costs[slot] <= successor_cost:
+                    continue
+
+                f = successor_cost + h
+                if f > threshold:
+                    if lowest_beyond is None or f < lowest_beyond:
+                        lowest_beyond = f
+                    collision = current and table_keys[slot] != key
+                    lost = lost or collision
+                    # a state within the threshold keeps its slot, so pruning isn't weakened
+                    if not collision or table_beyond[slot] >= 0:
+                        if not current or table_beyond[slot] < 0:
+                            beyond_slots.append(slot)
+                        table_keys[slot] = key
+                        table_stamps[slot] = iteration
+                        table_costs[slot] = successor_cost
+                        table_beyond[slot] = f
+                    continue
+
+                if current and table_beyond[slot] >= 0 and table_keys[slot] != key:
+                    lost = True
+                table_keys[slot] = key
+                table_stamps[slot] = iteration
+                table_costs[slot] = successor_cost
+                table_beyond[slot] = -1
+
+                states.append(successor_state)
+                codes.append(successor)
+                costs.append(successor_cost)
+                successors.append(None)
+                next_index.append(0)
+                on_path.add(successor)
+                pushed = True
+                break
+
+            # all successors tried: backtrack
+            if not pushed:
+                on_path.discard(codes[top])
+                states.pop()
+                codes.pop()
+                costs.pop()
+                successors.pop()
+                next_index.pop()
+
+        if lost:
+            threshold = lowest_beyond
+        else:
+            threshold = min((table_beyond[slot] for slot in beyond_slots if table_beyond[slot] >= 0),
+                            default=None)
+
+    return solution
+
+
+# A node of the SMA* search tree. f is the node's own f-value (never lower than its
+#  parent's), key the lowest f-value among its successors that are not in memory (its
+#  own f before it is first expanded, infinity once there are none left). forgotten
+#  maps the codes of forgotten children to their backed-up f-values.
+class SmaNode:
+    __slots__ = ("state", "code", "g", "f", "key", "depth", "parent", "children", "forgotten",
+                 "version", "serial", "alive")
+
+    def __init__(self, state, code, g, f, key, depth, parent, serial):
+        self.state = state
+        self.code = code
+        self.g = g
+        self.f = f
+        self.key = key
+        self.depth = depth
+        self.parent = parent
+        self.children = {}
+        self.forgotten = {}
+        self.version = 0  # bumped whenever key or leaf status changes, to retire heap entries
+        self.serial = serial
+        self.alive = True
+
+
+# SMA* with a budget of max_nodes nodes in memory. A selected node adds just its best
+#  successor that isn't in memory yet and stays on the open list keyed by the next best
+#  one. The best node is the one with the lowest key (highest g, then deepest, first),
+#  the worst the leaf with the highest key (lowest g, then shallowest, first).
+#  Without a closed list the same state can be reached along many paths (Mazeworld waits
+#  cost nothing, so robots can wait in any order), so SMA* keeps a transposition table
+#  like IDA*'s: for table_size hash slots, a state with the cost and parent it was last
+#  added to the tree with. A successor reached at a higher cost, or at the same cost
+#  from another parent, is skipped; the copy it duplicates is either in memory or has
+#  its f-value backed up into an ancestor, so no better solution is lost. States no goal
+#  can be reached from are never added. If the memory can't hold a path to any goal, the
+#  search fails with an empty path.
+def smastar_search(search_problem, heuristic_fn, max_nodes=MAX_NODES, table_size=TABLE_SIZE):
+    encode = getattr(search_problem, "encode", same_state)
+    infinity = float("inf")
+    solution = SearchSolution(search_problem, "SMA* with heuristic " + heuristic_fn.__name__)
+
+    table_keys = [None] * table_size
+    table_costs = [0] * table_size
+    table_parents = [None] * table_size
+
+    start_state = search_problem.start_state
+    start_f = heuristic_fn(start_state)
+    if unreachable(start_f):
+        return solution
+    root = SmaNode(start_state, encode(start_state), 0, start_f, start_f, 0, None, 0)
+    count = 1
+    serial = 1
+
+    best_pq = [(root.key, 0, 0, 0, 0, root)]    # (key, -g, -depth, serial, version, node)
+    worst_pq = [(-root.key, 0, 0, 0, 0, root)]  # leaves: (-key, g, depth, serial, version, node)
+
+    while len(best_pq) > 0:
+        version, node = heappop(best_pq)[4:]
+        if not node.alive or version != node.version or node.key == infinity:
+            continue
+        solution.nodes_visited += 1
+
+        if search_problem.goal_test(node.state):
+            solution.path = sma_backchain(node)
+            solution.cost = node.g
+            return solution
+
+        # find the best and second best successors not in memory
+        best = None
+        next_key = infinity
+        for transition_cost, successor_state in search_problem.get_successors(node.state):
+            successor = encode(successor_state)
+            if successor in node.children:
+                continue
+            successor_cost = node.g + transition_cost
+            slot = hash((successor,)) % table_size
+            if table_keys[slot] == successor and (table_costs[slot] < successor_cost or (
+                    table_costs[slot] == successor_cost and table_parents[slot] != node.code)):
+                continue
+            if on_zero_cost_cycle(node, successor, successor_cost):
+                continue
+
+            h = heuristic_fn(successor_state)
+            if unreachable(h):
+                continue
+
+            # pathmax, and a forgotten child's backed-up f-value is a bound for its successors too
+            f = max(node.f, successor_cost + h, node.forgotten.get(successor, 0))
+            successor_key = f
+            if node.depth + 2 >= max_nodes and not search_problem.goal_test(successor_state):
+                successor_key = infinity  # no room for a path through it
+
+            if best is None or successor_key < best[0]:
+                if best is not None:
+                    next_key = min(next_key, best[0])
+                best = (successor_key, f, successor_cost, successor, successor_state, slot)
+            else:
+                next_key = min(next_key, successor_key)
+
+        node.key = next_key
+        node.version += 1
+        if next_key < infinity:
+            heappush(best_pq, (next_key, -node.g, -node.depth, node.serial, node.version, node))
+        if best is None:
+            if len(node.children) == 0:
+                heappush(worst_pq, (-node.key, node.g, node.depth, node.serial, node.version, node))
+            continue
+
+        successor_key, f, successor_cost, successor, successor_state, slot = best
+        node.forgotten.pop(successor, None)
+        child = SmaNode(successor_state, successor, successor_cost, f, successor_key, node.depth + 1, node, serial)
+        serial += 1
+        node.children[successor] = child
+        table_keys[slot] = successor
+        table_costs[slot] = successor_cost
+        table_parents[slot] = node.code
+        count += 1
+        if successor_key < infinity:
+            heappush(best_pq, (successor_key, -child.g, -child.depth, child.serial, 0, child))
+        heappush(worst_pq, (-successor_key, child.g, child.depth, child.serial, 0, child))
+
+        # over budget: forget the worst leaves, other than the root and the new child
+        spared = []
+        while count > max_nodes and len(worst_pq) > 0:
+            entry = heappop(worst_pq)
+            leaf = entry[5]
+            if not leaf.alive or entry[4] != leaf.version or len(leaf.children) > 0:
+                continue
+            if leaf is root or leaf is child:
+                spared.append(entry)
+                continue
+            forget(leaf, best_pq, worst_pq)
+            count -= 1
+        for entry in spared:
+            heappush(worst_pq, entry)
+
+        # the heaps keep stale entries until they come out; drop them once they
+        #  outnumber the nodes, so the heaps stay within the memory budget too
+        if len(best_pq) > 2 * count + 2:
+            best_pq = [entry for entry in best_pq if entry[5].alive and entry[4] == entry[5].version
+                       and entry[5].key < infinity]
+            heapify(best_pq)
+        if len(worst_pq) > 2 * count + 2:
+            worst_pq = [entry for entry in worst_pq if entry[5].alive and entry[4] == entry[5].version
+                        and len(entry[5].children) == 0]
+            heapify(worst_pq)
+
+    return solution
+
+
+# Remove a leaf from memory, backing its key up into its parent: the parent goes back on
+#  the open list if this is now its best successor outside memory, and becomes a leaf
+#  itself if it has no children left
+def forget(leaf, best_pq, worst_pq):
+    leaf.alive = False
+
+    parent = leaf.parent
+    del parent.children[leaf.code]
+    parent.forgotten[leaf.code] = leaf.key
+    parent.version += 1
+    if leaf.key < parent.key:
+        parent.key = leaf.key
+    if parent.key < float("inf"):
+        heappush(best_pq, (parent.key, -parent.g, -parent.depth, parent.serial, parent.version, parent))
+    if len(parent.children) == 0:
+        heappush(worst_pq, (-parent.key, parent.g, parent.depth, parent.serial, parent.version, parent))
+
+
+# Is state code an ancestor of node reached at the same cost? Only ancestors at the same
+#  cost need checking (the table prunes ones reached more cheaply), and with Mazeworld
+#  waits a run of moves that cost nothing repeats a state within one round.
+def on_zero_cost_cycle(node, code, cost):
+    while node is not None and node.g == cost:
+        if node.code == code:
+            return True
+        node = node.parent
+    return False
+
+
+# follow parents back from node to the root
+def sma_backchain(node):
+    result = []
+    while node is not None:
+        result.append(node.state)
+        node = node.parent
+
+    result.reverse()
+    return result
@@ -1,10 +1,12 @@
 from MazeworldProblem import MazeworldProblem
-from Maze import Maze
+from Maze import Maze, build_maze
 
 from uninformed_search import bfs_search
 from astar_search import astar_search
-
-import random
+from arastar_search import arastar_search
+from memory_bounded_search import idastar_search, smastar_search
+from cooperative_search import cooperative_search
+from cbs_search import cbs_search
 
 
 # null heuristic, useful for testing astar search without heuristic (uniform cost search).
@@ -12,46 +14,6 @@ def null_heuristic(state):
     return 0
 
 
-# build a new maze based on specified width/height
-# wall_prob - probability of a wall at a specific tile
-# returns the filename of the maze, number of robots, goal locations for the robots
-def build_maze(width, height, wall_prob):
-    filename = "maze" + str(width) + "x" + str(height) + ".maz"
-    out_maze = open(filename, "w")
-    available_positions = []
-
-    for y in range(height):
-        line = ""
-        for x in range(width):
-            if random.uniform(0, 1) <= wall_prob:
-                line += "#"
-            else:
-                line += "."
-                available_positions.append((x, y))
-        out_maze.write(line + '\n')
-
-    # shuffles the potential starting positions for the robots
-    random.shuffle(available_positions)
-
-    # starting number of robots
-    num_robots = random.randint(1, 3)
-    for i in range(num_robots):
-        x, y = available_positions.pop()
-        out_maze.write("\\robot " + str(x) + " " + str(y) + '\n')
-
-    # randomized goal locations for robots
-    goal_locations = []
-    for i in range(num_robots):
-        x, y = available_positions.pop()
-        goal_locations.append(x)
-        goal_locations.append(y)
-
-    out_maze.close()
-    print("created: " + filename)
-
-    return filename, num_robots, tuple(goal_locations)
-
-
 # Test problems
 test_maze3 = Maze("maze3.maz")
 test_mp = MazeworldProblem(test_maze3, (1, 4, 1, 3, 1, 2))
@@ -91,12 +53,53 @@ result4 = astar_search(test_m4, test_m4.manhattan_heuristic)
 print(result4)
 test_m4.animate_path(result4.path)
 
+# Maze 4 again with weighted A*: cost at most twice the optimal cost, fewer nodes
+result4_weighted = astar_search(test_m4, test_m4.manhattan_heuristic, weight=2)
+print(result4_weighted)
+
+# Maze 4 again with ARA*, printing every improved solution as it is found
+def print_bound(solution, bound):
+    print("cost {:d} within {:.2f} of optimal".format(solution.cost, bound))
+
+result4_ara = arastar_search(test_m4, test_m4.manhattan_heuristic, time_limit=1, callback=print_bound)
+print(result4_ara)
+
+# Maze 4 again with the memory-bounded searches; SMA* keeps at most 500 nodes
+result4_ida = idastar_search(test_m4, test_m4.distance_heuristic)
+print(result4_ida)
+
+result4_sma = smastar_search(test_m4, test_m4.distance_heuristic, max_nodes=500)
+print(result4_sma)
+
+# Maze 4 again, planning the robots one at a time
+result4_coop = cooperative_search(test_m4)
+print(result4_coop)
+test_m4.animate_path(result4_coop.path)
+
+# Maze 4 again, with Conflict-Based Search
+result4_cbs = cbs_search(test_m4)
+print(result4_cbs)
+
+# Three robots crowded into a 4x4 maze: the constraint tree grows too fast for CBS to
+#  get through it, so it has to finish with joint A* and still find the cheapest plan
+test_maze4x4 = Maze("maze4x4.maz")
+test_m4x4 = MazeworldProblem(test_maze4x4, (2,2, 0,2, 1,3))
+result4x4_cbs = cbs_search(test_m4x4)
+print(result4x4_cbs)
+assert result4x4_cbs.cost == 17
+
 # Unsolvable Test
 test_maze5 = Maze("maze5.maz")
 test_m5 = MazeworldProblem(test_maze5, (3,2, 7,3, 5,5))
 result5 = astar_search(test_m5, test_m5.manhattan_heuristic)
 print(result5)
 
+# The memory-bounded searches have to give up on it too rather than raise their
+#  thresholds (or thrash) forever
+result5_ida = idastar_search(test_m5, test_m5.distance_heuristic)
+result5_sma = smastar_search(test_m5, test_m5.distance_heuristic, max_nodes=500)
+assert len(result5_ida.path) == 0 and len(result5_sma.path) == 0
+
 # Using build_maze function to generate a random maze
 random_maze, num_robots, goal_locations = build_maze(10, 10, 0.2)
 print(goal_locations)
@@ -38,5 +38,8 @@ result = astar_search(test_sensorless, test_sensorless.possible_heuristic)
 print(result)
 test_sensorless.animate_path(result.path)
 
-
-
+# Maze 5 again with the admissible localization heuristic: an optimal plan
+test_sensorless = SensorlessProblem(test_maze8)
+result = astar_search(test_sensorless, test_sensorless.localization_heuristic)
+print(result)
+test_sensorless.animate_path(result.path)
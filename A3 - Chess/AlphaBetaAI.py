@@ -5,7 +5,9 @@ Dartmouth COSC 76, Fall 2023
 
 import chess
 import time
+from Evaluator import Evaluator
 from math import inf
+from MoveOrdering import MoveOrdering
 
 use_reorder_func = True
 
@@ -23,6 +25,8 @@ class AlphaBetaAI():
             "q": 9,
             "k": 1000
         }
+        self.evaluator = Evaluator(self.piece_values)
+        self.move_ordering = MoveOrdering()
 
     """
     Chooses the best move using alpha-beta pruning algorithm
@@ -34,6 +38,8 @@ class AlphaBetaAI():
     def choose_move(self, board):
         start = time.time()
         self.turn = board.turn  # current player's turn
+        self.evaluator.reset(board)
+        self.move_ordering.new_search()
         best_move_value = float('-inf')
         best_move = None
 
@@ -43,7 +49,7 @@ class AlphaBetaAI():
             beta = float('inf')
 
             # apply legal move to the board
-            board.push(move)
+            self.push(board, move)
             # call value method to evaluate current board state
             move_value = self.value(board, self.depth - 1, alpha, beta,False)
 
@@ -53,7 +59,7 @@ class AlphaBetaAI():
                 best_move = move
 
             # revert move to restore original board -> to conduct search on other moves
-            board.pop()
+            self.pop(board)
 
         print(f"Alpha-Beta AI recommending move {best_move} with value {best_move_value}")
         print(f"\tNodes searched: {self.num_calls}")
@@ -64,19 +70,16 @@ class AlphaBetaAI():
         return best_move
 
     """
-    Reorders moves to give priority to capturing moves
+    Orders moves so the ones most likely to cause a cut-off come first
     Params:
     - board: current state of the chess board.
-    - moves: list of legal moves 
+    - moves: list of legal moves
+    - depth: remaining depth of the search at this node
     Returns:
     - Reordered list of legal moves
     """
-    def reorder_moves(self, board, moves):
-        for move in moves:
-            if board.is_capture(move):
-                moves.insert(0, moves.pop(moves.index(move)))
-        moves.reverse()
-        return moves
+    def reorder_moves(self, board, moves, depth):
+        return self.move_ordering.order(board, moves, self.depth - depth)
 
     """
     Determines whether to call min_value or max_value based on current player
@@ -108,20 +111,21 @@ class AlphaBetaAI():
         val = float('-inf')
         moves = list(board.legal_moves)
         if use_reorder_func:
-            legal_moves = self.reorder_moves(board, moves)
+            legal_moves = self.reorder_moves(board, moves, depth)
         else:
             legal_moves = moves
 
         # iterate over all legal moves to find the one with the highest value
         for move in legal_moves:
-            board.push(move)  # apply move to the board
+            self.push(board, move)  # apply move to the board
 
             # recursive call to evaluate current move
             val = max(val, self.value(board, depth - 1, alpha, beta, not is_maximizer))
-            board.pop()  # reverts move to restore original board state
+            self.pop(board)  # reverts move to restore original board state
 
             # performs beta cut-off if value is >= beta
             if val >= beta:
+                self.move_ordering.record_cutoff(board, move, self.depth - depth, depth)
                 return val
             alpha = max(alpha, val)
 
@@ -135,23 +139,43 @@ class AlphaBetaAI():
         val = float('inf')
         moves = list(board.legal_moves)
         if use_reorder_func:
-            legal_moves = self.reorder_moves(board, moves)
+            legal_moves = self.reorder_moves(board, moves, depth)
         else:
             legal_moves = moves
 
         # iterate over all legal moves to find the one with the lowest value
         for move in legal_moves:
-            board.push(move)  # apply move to the board
+            self.push(board, move)  # apply move to the board
             val = min(val, self.value(board, depth - 1, alpha, beta, not is_maximizer))
-            board.pop()  # revert move to restore original board state
+            self.pop(board)  # revert move to restore original board state
 
             # performs alpha cut-off if value is <= alpha
             if val <= alpha:
+                self.move_ordering.record_cutoff(board, move, self.depth - depth, depth)
                 return val
             beta = min(beta, val)
 
         return val
 
+    """
+    Applies a move to the board, updating the evaluator's running scores
+    Params:
+    - board: current chess board state
+    - move: legal move to apply
+    """
+    def push(self, board, move):
+        self.evaluator.update(board, move)
+        board.push(move)
+
+    """
+    Reverts the last move applied with push
+    Params:
+    - board: current chess board state
+    """
+    def pop(self, board):
+        board.pop()
+        self.evaluator.undo()
+
     """
     Tests whether the search should be cut off - if max depth is reached or game is over
     Returns boolean indicating whether the search should be cut off
@@ -160,7 +184,8 @@ class AlphaBetaAI():
         return depth == 0 or board.is_game_over()
 
     """
-    Evaluates and returns current board state
+    Evaluates and returns current board state: checkmate, or material and piece
+    positions from the current player's side
     """
     def evaluation(self, board):
         score = 0  # initializes score
@@ -172,15 +197,8 @@ class AlphaBetaAI():
                 score -= self.piece_values["k"]
 
         else:
-            pieces = board.piece_map()  # map of pieces on chessboard
-
-            # iterate over pieces to calculate values
-            for piece in pieces.values():
-                value = self.piece_values[str(piece).lower()]
-                if piece.color == self.turn:
-                    score += value
-                else:
-                    score -= value
+            # material and piece-square scores, kept up to date as moves are pushed
+            score = self.evaluator.score(board, self.turn)
 
         return score
 
@@ -5,6 +5,7 @@ Dartmouth COSC 76, Fall 2023
 
 import chess
 import time
+from Evaluator import Evaluator
 from math import inf
 
 
@@ -23,6 +24,7 @@ class AlphaBetaAI2():
             "q": 9,
             "k": 1000
         }
+        self.evaluator = Evaluator(self.piece_values)
 
     """
     Chooses the best move using alpha-beta pruning algorithm
@@ -34,6 +36,7 @@ class AlphaBetaAI2():
     def choose_move(self, board):
         start = time.time()
         self.turn = board.turn  # current player's turn
+        self.evaluator.reset(board)
         best_move_value = float('-inf')
         best_move = None
 
@@ -45,7 +48,7 @@ class AlphaBetaAI2():
                 beta = float('inf')
 
                 # apply legal move to the board
-                board.push(move)
+                self.push(board, move)
                 # call value method to evaluate current board state
                 move_value = self.value(board, self.depth - 1, alpha, beta,False)
 
@@ -55,7 +58,7 @@ class AlphaBetaAI2():
                     best_move = move
 
                 # revert move to restore original board -> to conduct search on other moves
-                board.pop()
+                self.pop(board)
 
         print(f"Alpha-Beta AI2 recommending move {best_move} with value {best_move_value}")
         print(f"\tNodes searched: {self.num_calls}")
@@ -108,10 +111,10 @@ class AlphaBetaAI2():
     def max_value(self, board, depth, alpha, beta, is_maximizer):
         val = float('-inf')
         for move in self.reorder_moves_advanced(board, depth):
-            board.push(move)
+            self.push(board, move)
             val = max(val, self.value(board, depth - 1, alpha, beta, not is_maximizer))
             self.trans_table[board.fen()] = val
-            board.pop()
+            self.pop(board)
             if val >= beta:
                 return val
             alpha = max(alpha, val)
@@ -125,16 +128,35 @@ class AlphaBetaAI2():
     def min_value(self, board, depth, alpha, beta, is_maximizer):
         val = float('inf')
         for move in self.reorder_moves_advanced(board, depth):
-            board.push(move)
+            self.push(board, move)
             val = min(val, self.value(board, depth - 1, alpha, beta, not is_maximizer))
             self.trans_table[board.fen()] = val
-            board.pop()
+            self.pop(board)
             if val <= alpha:
                 return val
             beta = min(beta, val)
 
         return val
 
+    """
+    Applies a move to the board, updating the evaluator's running scores
+    Params:
+    - board: current chess board state
+    - move: legal move to apply
+    """
+    def push(self, board, move):
+        self.evaluator.update(board, move)
+        board.push(move)
+
+    """
+    Reverts the last move applied with push
+    Params:
+    - board: current chess board state
+    """
+    def pop(self, board):
+        board.pop()
+        self.evaluator.undo()
+
     """
     Tests whether the search should be cut off - if max depth is reached or game is over
     Returns boolean indicating whether the search should be cut off
@@ -143,7 +165,8 @@ class AlphaBetaAI2():
         return depth == 0 or board.is_game_over()
 
     """
-    Evaluates and returns current board state
+    Evaluates and returns current board state: checkmate, or material and piece
+    positions from the current player's side
     """
     def evaluation(self, board):
         score = 0  # initializes score
@@ -155,15 +178,8 @@ class AlphaBetaAI2():
                 score -= self.piece_values["k"]
 
         else:
-            pieces = board.piece_map()  # map of pieces on chessboard
-
-            # iterate over pieces to calculate values
-            for piece in pieces.values():
-                value = self.piece_values[str(piece).lower()]
-                if piece.color == self.turn:
-                    score += value
-                else:
-                    score -= value
+            # material and piece-square scores, kept up to date as moves are pushed
+            score = self.evaluator.score(board, self.turn)
 
         return score
 
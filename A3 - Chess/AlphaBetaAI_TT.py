@@ -5,20 +5,31 @@ Dartmouth COSC 76, Fall 2023
 
 import chess
 import time
+from Evaluator import Evaluator
 from math import inf
 from BoardHash import BoardHash
 from ZobristHash import ZobristHash
+from TranspositionTable import TranspositionTable, EXACT, LOWER, UPPER
+from MoveOrdering import MoveOrdering
 from AlphaBetaAI import AlphaBetaAI
 
 use_reorder_func = True
-use_zobrist_hash = False
+use_zobrist_hash = True
+
+TT_SIZE_MB = 16  # default memory budget of the transposition table
+TIME_CHECK_INTERVAL = 1024  # nodes searched between checks of the deadline
+
+
+class SearchTimeout(Exception):
+    pass
+
 
 class AlphaBetaAI_TT():
 
-    def __init__(self, depth):
+    def __init__(self, depth, tt_size_mb=TT_SIZE_MB):
         self.depth = depth  # max depth of search tree
         self.num_calls = 0  # tracks number of calls to minimax
-        self.trans_table = {}
+        self.trans_table = TranspositionTable(tt_size_mb)
         self.piece_values = {
             "p": 1,
             "n": 3,
@@ -27,7 +38,12 @@ class AlphaBetaAI_TT():
             "q": 9,
             "k": 1000
         }
+        self.evaluator = Evaluator(self.piece_values)
         self.zobrist_hash = ZobristHash()
+        self.move_ordering = MoveOrdering()
+        self.line = []        # moves pushed since the root of the search
+        self.pv = []          # principal variation to search first
+        self.deadline = None  # time.time() at which to give up the search, if any
 
     """
     Chooses the best move using alpha-beta pruning algorithm
@@ -38,27 +54,8 @@ class AlphaBetaAI_TT():
     """
     def choose_move(self, board):
         start = time.time()
-        self.turn = board.turn  # current player's turn
-        value = float('-inf')
-        best_move = None
-
-        # iterate through all legal moves for current board state
-        for move in list(board.legal_moves):
-            alpha = float('-inf')
-            beta = float('inf')
-
-            # apply legal move to the board
-            board.push(move)
-            # call value method to evaluate current board state
-            move_value = self.value(board, self.depth - 1, alpha, beta,False)
-
-            # if new move value > best found value -> update best move
-            if move_value > value:
-                value = move_value
-                best_move = move
-
-            # revert move to restore original board -> to conduct search on other moves
-            board.pop()
+        self.start_search(board)
+        best_move, value, completed = self.search_root(board, self.depth)
 
         if use_zobrist_hash:
             print(f"AlphaBetaAI_TT (using Zobrist) recommending move {best_move} with value {value}")
@@ -75,22 +72,127 @@ class AlphaBetaAI_TT():
         return best_move
 
     """
-    Reorders moves to give priority to capturing moves
+    Gets ready to search a new position: records whose turn it is, sets up the Zobrist
+    key and ages the transposition table
     Params:
-    - board: current state of the chess board.
-    - moves: list of legal moves 
+    - board: chess board the search starts from
+    """
+    def start_search(self, board):
+        self.turn = board.turn  # current player's turn
+        self.zobrist_hash.reset(board)
+        self.evaluator.reset(board)
+        self.trans_table.new_search()
+        self.move_ordering.new_search()
+        self.line = []
+        self.pv = []
+
+    """
+    Searches every legal move of the root to the given depth, the first move of the
+    principal variation (self.pv) first. Each move is searched with alpha set to the best
+    value found so far, so only moves that beat it get an exact value. If the deadline
+    passes, the search is abandoned and the board is restored to the root.
+    Params:
+    - board: current chess board state
+    - depth: depth to search to
+    - deadline: time.time() at which to stop, or None
     Returns:
-    - Reordered list of legal moves
+    - (best move, its value, whether every move was searched); the best move is None if
+      the deadline passed before the first move was searched
     """
-    def reorder_moves(self, board, moves):
-        for move in moves:
-            if board.is_capture(move):
-                moves.insert(0, moves.pop(moves.index(move)))
-        moves.reverse()
-        return moves
+    def search_root(self, board, depth, deadline=None):
+        self.deadline = deadline
+        value = float('-inf')
+        best_move = None
+
+        try:
+            # iterate through all legal moves for current board state
+            for move in self.ordered_moves(board, None):
+                # apply legal move to the board
+                self.push(board, move)
+                # call value method to evaluate current board state
+                move_value = self.value(board, depth - 1, value, float('inf'), False)
+
+                # revert move to restore original board -> to conduct search on other moves
+                self.pop(board)
+
+                # if new move value > best found value -> update best move
+                if move_value > value:
+                    value = move_value
+                    best_move = move
+        except SearchTimeout:
+            while len(self.line) > 0:
+                self.pop(board)
+            return best_move, value, False
+
+        # the root is stored too, so the principal variation can be read from the table
+        self.trans_table.store(self.board_key(board), value, depth, EXACT, best_move)
+        return best_move, value, True
+
+    """
+    Follows the best moves stored in the transposition table from the current board
+    Params:
+    - board: current chess board state
+    - depth: longest variation to return
+    Returns:
+    - List of moves, the best line of play found by the search
+    """
+    def principal_variation(self, board, depth):
+        pv = []
+        while len(pv) < depth:
+            entry = self.trans_table.probe(self.board_key(board))
+            if entry is None or entry[3] is None or not board.is_legal(entry[3]):
+                break
+            pv.append(entry[3])
+            self.push(board, entry[3])
+
+        for move in pv:
+            self.pop(board)
+        return pv
+
+    """
+    Key of the current board in the transposition table
+    Params:
+    - board: current chess board state
+    Returns:
+    - 64-bit integer key
+    """
+    def board_key(self, board):
+        if use_zobrist_hash:
+            return self.zobrist_hash.key
+        return hash(BoardHash(board)) & (2**64 - 1)
+
+    """
+    Applies a move to the board, updating the Zobrist key and the evaluator incrementally
+    Params:
+    - board: current chess board state
+    - move: legal move to apply
+    """
+    def push(self, board, move):
+        self.evaluator.update(board, move)
+        if use_zobrist_hash:
+            self.zobrist_hash.push(board, move)
+        else:
+            board.push(move)
+        self.line.append(move)
 
     """
-    Determines whether to call min_value or max_value based on current player
+    Reverts the last move applied with push, restoring the Zobrist key and evaluator from before it
+    Params:
+    - board: current chess board state
+    """
+    def pop(self, board):
+        if use_zobrist_hash:
+            self.zobrist_hash.pop(board)
+        else:
+            board.pop()
+        self.evaluator.undo()
+        self.line.pop()
+
+    """
+    Determines whether to call min_value or max_value based on current player.
+    A position found in the transposition table, searched at least as deep, is not
+    searched again if its stored value is exact or its bound already cuts off; a stored
+    bound that doesn't cut off still narrows the alpha-beta window.
     Params:
     - board: current state of the chess board.
     - depth: current depth in the game tree.
@@ -100,15 +202,25 @@ class AlphaBetaAI_TT():
     """
     def value(self, board, depth, alpha, beta, is_maximizer):
         self.num_calls += 1
-
-        board_hash = None
-        if use_zobrist_hash:
-            board_hash = self.zobrist_hash.hash(board)
-        else:
-            board_hash = BoardHash(board)
-
-        if board_hash in self.trans_table and depth in self.trans_table[board_hash]:
-            return self.trans_table[board_hash][depth]
+        if (self.deadline is not None and self.num_calls % TIME_CHECK_INTERVAL == 0
+                and time.time() > self.deadline):
+            raise SearchTimeout()
+
+        board_hash = self.board_key(board)
+
+        hash_move = None
+        entry = self.trans_table.probe(board_hash)
+        if entry is not None:
+            stored_value, stored_depth, flag, hash_move = entry
+            if stored_depth >= depth:
+                if flag == EXACT:
+                    return stored_value
+                if flag == LOWER:
+                    alpha = max(alpha, stored_value)
+                else:
+                    beta = min(beta, stored_value)
+                if alpha >= beta:
+                    return stored_value
 
         # if cutoff test passes, evaluate current board state
         if self.cutoff_test(board, depth):
@@ -116,69 +228,98 @@ class AlphaBetaAI_TT():
 
         # if current player is maximizing, calls max_value helper function
         if is_maximizer:
-            val = self.max_value(board, depth, alpha, beta, is_maximizer)
+            val, best_move = self.max_value(board, depth, alpha, beta, is_maximizer, hash_move)
         else:
-            val = self.min_value(board, depth, alpha, beta, is_maximizer)
+            val, best_move = self.min_value(board, depth, alpha, beta, is_maximizer, hash_move)
 
-        if board_hash not in self.trans_table:
-            self.trans_table[board_hash] = {}
-        self.trans_table[board_hash][depth] = val
+        # a value at or outside the window is only a bound on the true value
+        if val <= alpha:
+            flag = UPPER
+        elif val >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.trans_table.store(board_hash, val, depth, flag, best_move)
 
         return val
 
     """
-    Searches for the move with the highest value for the maximizing player.
-    Returns the value of the best move found for the maximizing player.
+    Orders the moves of a node: on the principal variation its next move first, then the
+    best move stored for the node in the transposition table, then (if use_reorder_func
+    is set) the rest as MoveOrdering ranks them
+    Params:
+    - board: current state of the chess board.
+    - hash_move: best move from the transposition table, or None
+    Returns:
+    - List of legal moves in the order to search them
     """
-    def max_value(self, board, depth, alpha, beta, is_maximizer):
-        val = float('-inf')
+    def ordered_moves(self, board, hash_move):
         moves = list(board.legal_moves)
+        ply = len(self.line)
 
         if use_reorder_func:
-            legal_moves = self.reorder_moves(board, moves)
-        else:
-            legal_moves = moves
+            moves = self.move_ordering.order(board, moves, ply, hash_move)
+        elif hash_move in moves:
+            moves.insert(0, moves.pop(moves.index(hash_move)))
+
+        if ply < len(self.pv) and self.line == self.pv[:ply] and self.pv[ply] in moves:
+            moves.insert(0, moves.pop(moves.index(self.pv[ply])))
+
+        return moves
+
+    """
+    Searches for the move with the highest value for the maximizing player.
+    Returns the value of the best move found for the maximizing player, and that move.
+    """
+    def max_value(self, board, depth, alpha, beta, is_maximizer, hash_move=None):
+        val = float('-inf')
+        best_move = None
 
         # iterate over all legal moves to find the one with the highest value
-        for move in legal_moves:
-            board.push(move)  # apply move to the board
+        for move in self.ordered_moves(board, hash_move):
+            self.push(board, move)  # apply move to the board
 
             # recursive call to evaluate current move
-            val = max(val, self.value(board, depth - 1, alpha, beta, not is_maximizer))
-            board.pop()  # reverts move to restore original board state
+            move_value = self.value(board, depth - 1, alpha, beta, not is_maximizer)
+            self.pop(board)  # reverts move to restore original board state
+
+            if move_value > val:
+                val = move_value
+                best_move = move
 
             # performs beta cut-off if value is >= beta
             if val >= beta:
-                return val
+                self.move_ordering.record_cutoff(board, move, len(self.line), depth)
+                return val, best_move
             alpha = max(alpha, val)
 
-        return val
+        return val, best_move
 
     """
     Searches for the move with the lowest value for the minimizing player.
-    Returns the value of the best move found for the minimizing player.
+    Returns the value of the best move found for the minimizing player, and that move.
     """
-    def min_value(self, board, depth, alpha, beta, is_maximizer):
+    def min_value(self, board, depth, alpha, beta, is_maximizer, hash_move=None):
         val = float('inf')
-        moves = list(board.legal_moves)
-
-        if use_reorder_func:
-            legal_moves = self.reorder_moves(board, moves)
-        else:
-            legal_moves = moves
+        best_move = None
 
         # iterate over all legal moves to find the one with the lowest value
-        for move in legal_moves:
-            board.push(move)  # apply move to the board
-            val = min(val, self.value(board, depth - 1, alpha, beta, not is_maximizer))
-            board.pop()  # revert move to restore original board state
+        for move in self.ordered_moves(board, hash_move):
+            self.push(board, move)  # apply move to the board
+            move_value = self.value(board, depth - 1, alpha, beta, not is_maximizer)
+            self.pop(board)  # revert move to restore original board state
+
+            if move_value < val:
+                val = move_value
+                best_move = move
 
             # performs alpha cut-off if value is <= alpha
             if val <= alpha:
-                return val
+                self.move_ordering.record_cutoff(board, move, len(self.line), depth)
+                return val, best_move
             beta = min(beta, val)
 
-        return val
+        return val, best_move
 
     """
     Tests whether the search should be cut off - if max depth is reached or game is over
@@ -188,7 +329,8 @@ class AlphaBetaAI_TT():
         return depth == 0 or board.is_game_over()
 
     """
-    Evaluates and returns current board state
+    Evaluates and returns current board state: checkmate, or material and piece
+    positions from the current player's side
     """
     def evaluation(self, board):
         score = 0  # initializes score
@@ -201,15 +343,8 @@ class AlphaBetaAI_TT():
                 score -= self.piece_values["k"]
 
         else:
-            pieces = board.piece_map()  # map of pieces on chessboard
-
-            # iterate over pieces to calculate values
-            for piece in pieces.values():
-                value = self.piece_values[str(piece).lower()]
-                if piece.color == self.turn:
-                    score += value
-                else:
-                    score -= value
+            # material and piece-square scores, kept up to date as moves are pushed
+            score = self.evaluator.score(board, self.turn)
         return score
 
 
@@ -0,0 +1,238 @@
+"""
+Modified by: Kevin King
+Dartmouth COSC 76, Fall 2023
+"""
+
+import chess
+from ZobristHash import piece_index
+
+# Piece-square tables, in hundredths of a pawn, from white's side of the board: the
+#  first row is rank 8 and the last rank 1, so a white piece on square s reads entry
+#  s ^ 56 and a black piece entry s. Opening / middlegame (MG) and endgame (EG) tables
+#  are blended by the game phase.
+
+PAWN_MG = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0]
+
+PAWN_EG = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     80,  80,  80,  80,  80,  80,  80,  80,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     30,  30,  30,  30,  30,  30,  30,  30,
+     15,  15,  15,  15,  15,  15,  15,  15,
+      5,   5,   5,   5,   5,   5,   5,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+      0,   0,   0,   0,   0,   0,   0,   0]
+
+KNIGHT = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50]
+
+BISHOP = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20]
+
+ROOK = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0]
+
+QUEEN = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20]
+
+KING_MG = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20]
+
+KING_EG = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50]
+
+# tables by piece type (index 0 unused: chess.PAWN is 1)
+MG_TABLES = [None, PAWN_MG, KNIGHT, BISHOP, ROOK, QUEEN, KING_MG]
+EG_TABLES = [None, PAWN_EG, KNIGHT, BISHOP, ROOK, QUEEN, KING_EG]
+
+# weight of each piece type in the game phase; all pieces on the board make MAX_PHASE
+PHASE_WEIGHTS = [0, 0, 1, 1, 2, 4, 0]
+MAX_PHASE = 24
+
+
+class Evaluator:
+    """
+    Material and piece-square evaluation kept up to date move by move. The search calls
+    reset on the root board, then update before each board.push and undo after each
+    board.pop, so evaluating a leaf is just blending two running sums by the game phase:
+    MG tables while all pieces are on the board, EG tables once only kings and pawns are.
+    Params:
+    - piece_values: value in pawns of each piece ("p", "n", "b", "r", "q"), as the AIs keep them
+    - mg_tables, eg_tables: piece-square tables by piece type, laid out like MG_TABLES
+    """
+    def __init__(self, piece_values, mg_tables=MG_TABLES, eg_tables=EG_TABLES):
+        # signed value (positive for white) of each piece on each square, indexed by
+        # piece_index * 64 + square
+        self.mg_values = [0] * (12 * 64)
+        self.eg_values = [0] * (12 * 64)
+        for piece_type in chess.PIECE_TYPES:
+            material = 100 * piece_values[chess.piece_symbol(piece_type)] if piece_type != chess.KING else 0
+            for color in chess.COLORS:
+                sign = 1 if color else -1
+                base = piece_index(piece_type, color) * 64
+                for square in chess.SQUARES:
+                    entry = square ^ 56 if color else square
+                    self.mg_values[base + square] = sign * (material + mg_tables[piece_type][entry])
+                    self.eg_values[base + square] = sign * (material + eg_tables[piece_type][entry])
+
+        self.board = None    # board the running sums follow
+        self.root_ply = 0    # length of its move stack at reset
+        self.mg = 0          # running sums, in hundredths of a pawn, positive for white
+        self.eg = 0
+        self.phase = 0
+        self.stack = []      # (mg, eg, phase) before each update
+
+    """
+    Computes the sums for a board from scratch
+    Params:
+    - board: chess board
+    Returns: (mg, eg, phase)
+    """
+    def compute(self, board):
+        mg = eg = phase = 0
+        for square, piece in board.piece_map().items():
+            i = piece_index(piece.piece_type, piece.color) * 64 + square
+            mg += self.mg_values[i]
+            eg += self.eg_values[i]
+            phase += PHASE_WEIGHTS[piece.piece_type]
+        return mg, eg, phase
+
+    """
+    Starts following a board
+    Params:
+    - board: chess board the search starts from
+    """
+    def reset(self, board):
+        self.board = board
+        self.root_ply = len(board.move_stack)
+        self.mg, self.eg, self.phase = self.compute(board)
+        self.stack = []
+
+    """
+    Updates the sums for a move about to be pushed: the moved piece leaves its square and
+    lands (promoted, if it is a promotion) on the new one, a captured piece (or pawn taken
+    en passant) is removed, and a castling rook moves too
+    Params:
+    - board: chess board before the move
+    - move: legal move about to be pushed
+    """
+    def update(self, board, move):
+        mg_values = self.mg_values
+        eg_values = self.eg_values
+        self.stack.append((self.mg, self.eg, self.phase))
+        mg = self.mg
+        eg = self.eg
+
+        from_square = move.from_square
+        to_square = move.to_square
+        color = board.turn
+        piece_type = board.piece_type_at(from_square)
+        i = piece_index(piece_type, color) * 64
+        mg -= mg_values[i + from_square]
+        eg -= eg_values[i + from_square]
+
+        if piece_type == chess.KING and board.is_castling(move):
+            rank = chess.square_rank(from_square)
+            if board.is_kingside_castling(move):
+                to_square = chess.square(6, rank)
+                rook_from, rook_to = chess.square(7, rank), chess.square(5, rank)
+            else:
+                to_square = chess.square(2, rank)
+                rook_from, rook_to = chess.square(0, rank), chess.square(3, rank)
+            r = piece_index(chess.ROOK, color) * 64
+            mg += mg_values[r + rook_to] - mg_values[r + rook_from]
+            eg += eg_values[r + rook_to] - eg_values[r + rook_from]
+        else:
+            captured_type = board.piece_type_at(to_square)
+            captured_square = to_square
+            if captured_type is None and piece_type == chess.PAWN and to_square == board.ep_square:
+                captured_type = chess.PAWN
+                captured_square = chess.square(chess.square_file(to_square), chess.square_rank(from_square))
+            if captured_type is not None:
+                c = piece_index(captured_type, not color) * 64 + captured_square
+                mg -= mg_values[c]
+                eg -= eg_values[c]
+                self.phase -= PHASE_WEIGHTS[captured_type]
+
+        if move.promotion is not None:
+            self.phase += PHASE_WEIGHTS[move.promotion] - PHASE_WEIGHTS[piece_type]
+            piece_type = move.promotion
+        i = piece_index(piece_type, color) * 64
+        self.mg = mg + mg_values[i + to_square]
+        self.eg = eg + eg_values[i + to_square]
+
+    """
+    Restores the sums from before the last update, after its move was popped
+    """
+    def undo(self):
+        self.mg, self.eg, self.phase = self.stack.pop()
+
+    """
+    Evaluates a board: material plus piece-square scores, blended between the MG and EG
+    tables by the game phase. The running sums are used if they follow this board;
+    any other board is evaluated from scratch.
+    Params:
+    - board: chess board
+    - color: side to evaluate for
+    Returns: score in pawns, positive if color is ahead
+    """
+    def score(self, board, color):
+        if board is self.board and len(board.move_stack) == self.root_ply + len(self.stack):
+            mg, eg, phase = self.mg, self.eg, self.phase
+        else:
+            mg, eg, phase = self.compute(board)
+
+        phase = min(phase, MAX_PHASE)
+        score = (mg * phase + eg * (MAX_PHASE - phase)) / (100 * MAX_PHASE)
+        return score if color else -score
+
@@ -3,21 +3,60 @@ Modified by: Kevin King
 Dartmouth COSC 76, Fall 2023
 """
 
-from AlphaBetaAI import AlphaBetaAI
-from MinimaxAI import MinimaxAI
+import time
+from AlphaBetaAI_TT import AlphaBetaAI_TT
 
 
 class IterativeDeepeningAI():
 
-    def __init__(self, depth):
+    """
+    Iterative deepening over AlphaBetaAI_TT: searches to depth 1, 2, ... up to depth,
+    keeping the transposition table between iterations and searching the previous
+    iteration's principal variation first, so each iteration mostly re-walks a tree whose
+    best moves are already known. With a time_limit (seconds per move), stops when the
+    time is up and plays the best move found so far.
+    Params:
+    - depth: deepest iteration
+    - time_limit: seconds allowed per move, or None to always search to depth
+    """
+    def __init__(self, depth, time_limit=None):
         self.depth_limit = depth
+        self.time_limit = time_limit
+        self.engine = AlphaBetaAI_TT(depth)
 
+    """
+    Chooses the best move by searching deeper and deeper until the depth or time limit
+    Params:
+    - board: current chess board state
+    Returns:
+    - The best move found by the deepest search that got far enough to have one
+    """
     def choose_move(self, board):
+        start = time.time()
+        deadline = None if self.time_limit is None else start + self.time_limit
+        engine = self.engine
+        engine.start_search(board)
+
         best_move = None
-        for depth in range(1, self.depth_limit):
-            player = MinimaxAI(depth)
-            best_move = player.choose_move(board)
+        value = None
+        for depth in range(1, self.depth_limit + 1):
+            move, move_value, completed = engine.search_root(board, depth, deadline)
+
+            # an unfinished iteration searched the previous best move first, so the best
+            # move it found is at least as good as that one
+            if move is not None:
+                best_move = move
+                value = move_value
+            if not completed:
+                break
+
+            engine.pv = engine.principal_variation(board, depth)
+            print(f"Iterative Deepening AI depth {depth}: move {best_move} with value {value}, "
+                  f"principal variation {' '.join(str(move) for move in engine.pv)}")
 
-            print(f"Iterative Deepening AI recommending move {best_move}")
+        print(f"Iterative Deepening AI recommending move {best_move} with value {value}")
+        print(f"\tNodes searched: {engine.num_calls}")
+        print(f"\tTime elapsed: {time.time() - start}")
+        engine.num_calls = 0
 
         return best_move
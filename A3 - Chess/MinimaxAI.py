@@ -5,6 +5,7 @@ Dartmouth COSC 76, Fall 2023
 
 import chess
 import time
+from Evaluator import Evaluator
 
 
 class MinimaxAI():
@@ -20,6 +21,7 @@ class MinimaxAI():
             "q": 9,
             "k": 1000
         }
+        self.evaluator = Evaluator(self.piece_values)
 
     """
     Chooses the best move using minimax algorithm
@@ -31,16 +33,17 @@ class MinimaxAI():
     def choose_move(self, board):
         start = time.time()
         self.turn = board.turn  # current player's turn
+        self.evaluator.reset(board)
         value = float('-inf')
         best_move = None
 
         for move in list(board.legal_moves):
-            board.push(move)
+            self.push(board, move)
             move_value = self.value(board, self.depth - 1, False)
             if move_value > value:
                 value = move_value
                 best_move = move
-            board.pop()
+            self.pop(board)
 
         print(f"Minimax AI recommending move {best_move} with value {value}")
         print(f"\tNodes searched: {self.num_calls}")
@@ -81,10 +84,10 @@ class MinimaxAI():
 
         # iterate over all legal moves to find the one with the highest value
         for move in list(board.legal_moves):
-            board.push(move)  # apply move to the board
+            self.push(board, move)  # apply move to the board
             # recursive call to evaluate current move
             val = max(val, self.value(board, depth - 1, not is_maximizer))
-            board.pop()  # reverts move to restore original board state
+            self.pop(board)  # reverts move to restore original board state
         return val
 
     """
@@ -96,11 +99,30 @@ class MinimaxAI():
 
         # iterate over all legal moves to find the one with the lowest value
         for move in list(board.legal_moves):
-            board.push(move)  # apply move to the board
+            self.push(board, move)  # apply move to the board
             val = min(val, self.value(board, depth - 1, not is_maximizer))
-            board.pop()  # revert move to restore original board state
+            self.pop(board)  # revert move to restore original board state
         return val
 
+    """
+    Applies a move to the board, updating the evaluator's running scores
+    Params:
+    - board: current chess board state
+    - move: legal move to apply
+    """
+    def push(self, board, move):
+        self.evaluator.update(board, move)
+        board.push(move)
+
+    """
+    Reverts the last move applied with push
+    Params:
+    - board: current chess board state
+    """
+    def pop(self, board):
+        board.pop()
+        self.evaluator.undo()
+
     """
     Tests whether the search should be cut off - if max depth is reached or game is over
     Returns boolean indicating whether the search should be cut off
@@ -109,7 +131,8 @@ class MinimaxAI():
         return depth == 0 or board.is_game_over()
 
     """
-    Evaluates and returns current board state
+    Evaluates and returns current board state: checkmate, or material and piece
+    positions from the current player's side
     """
     def evaluation(self, board):
         score = 0  # initializes score
@@ -121,16 +144,8 @@ class MinimaxAI():
                 score -= self.piece_values["k"]
 
         else:
-            pieces = board.piece_map()  # map of pieces on chessboard
-
-            # iterate over pieces to calculate values
-            for piece in pieces.values():
-                value = self.piece_values[str(piece).lower()]
-
-                if piece.color == self.turn:
-                    score += value
-                else:
-                    score -= value
+            # material and piece-square scores, kept up to date as moves are pushed
+            score = self.evaluator.score(board, self.turn)
 
         return score
 
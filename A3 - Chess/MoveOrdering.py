@@ -0,0 +1,95 @@
+"""
+Modified by: Kevin King
+Dartmouth COSC 76, Fall 2023
+"""
+
+import chess
+
+# ordering tiers: a move's score is its tier times TIER, plus a score within the tier
+TIER = 2**32
+HASH_TIER = 4     # best move from the transposition table
+CAPTURE_TIER = 3  # captures and promotions, most valuable victim / least valuable attacker
+KILLER_TIER = 2   # quiet moves that caused a cut-off at the same ply
+QUIET_TIER = 1    # other quiet moves, by history score
+
+KILLER_SLOTS = 2
+
+
+class MoveOrdering:
+    """
+    Orders moves for alpha-beta search so the moves most likely to cause a cut-off are
+    searched first. Every move gets a score in one pass and the list is sorted once:
+    captures by most valuable victim / least valuable attacker, then the killer moves of
+    the ply (the last quiet moves to cause a cut-off there), then the remaining quiet
+    moves by their history score (how much cut-off search depth they have produced,
+    indexed by from and to square).
+    """
+    def __init__(self):
+        self.killers = []  # per ply, the last KILLER_SLOTS quiet moves that caused a cut-off
+        self.history = [0] * (64 * 64)
+
+    """
+    Gets ready for a new search: killers are forgotten (the plies now refer to other
+    positions) and history scores halved, so older cut-offs count for less
+    """
+    def new_search(self):
+        self.killers = []
+        self.history = [score // 2 for score in self.history]
+
+    """
+    Sorts moves, best first
+    Params:
+    - board: current state of the chess board
+    - moves: list of legal moves
+    - ply: number of moves from the root of the search
+    - hash_move: best move from the transposition table, searched first, or None
+    Returns:
+    - The sorted list of moves
+    """
+    def order(self, board, moves, ply, hash_move=None):
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history
+        piece_type_at = board.piece_type_at
+        ep_square = board.ep_square
+
+        def score(move):
+            if move == hash_move:
+                return HASH_TIER * TIER
+            from_square = move.from_square
+            to_square = move.to_square
+            attacker = piece_type_at(from_square)
+            victim = piece_type_at(to_square)
+            if victim is None and attacker == chess.PAWN and to_square == ep_square:
+                victim = chess.PAWN
+            if victim is not None or move.promotion is not None:
+                return CAPTURE_TIER * TIER + 10 * ((victim or 0) + (move.promotion or 0)) - attacker
+            if move in killers:
+                return KILLER_TIER * TIER + KILLER_SLOTS - killers.index(move)
+            return QUIET_TIER * TIER + history[from_square * 64 + to_square]
+
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    """
+    Records a move that caused a cut-off: a quiet move becomes a killer of its ply and
+    gains history score, more for deeper searches
+    Params:
+    - board: chess board before the move
+    - move: move that caused the cut-off
+    - ply: number of moves from the root of the search
+    - depth: remaining depth the move was searched to
+    """
+    def record_cutoff(self, board, move, ply, depth):
+        if board.is_capture(move) or move.promotion is not None:
+            return
+
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[KILLER_SLOTS:]
+
+        history = self.history
+        index = move.from_square * 64 + move.to_square
+        history[index] = min(history[index] + depth * depth, TIER - 1)
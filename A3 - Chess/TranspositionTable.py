@@ -0,0 +1,115 @@
+"""
+Modified by: Kevin King
+Dartmouth COSC 76, Fall 2023
+"""
+
+import chess
+from array import array
+
+# kinds of value stored for a position
+EXACT = 1   # the value of the position
+LOWER = 2   # the value is at least this (the search failed high, with a beta cut-off)
+UPPER = 3   # the value is at most this (no move raised alpha)
+
+# bytes per entry: key (8), value (8), depth (1), flag (1), generation (1), move (2)
+ENTRY_SIZE = 21
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table kept in parallel arrays, so it never grows past its
+    memory budget however long the game. The table is a power of two of buckets with two
+    entries each: the first keeps the deepest search of a position in the bucket (unless
+    it is left over from an earlier move), the second the most recent one.
+    Params:
+    - size_mb: memory budget in megabytes
+    """
+    def __init__(self, size_mb):
+        buckets = 1
+        while buckets * 4 * ENTRY_SIZE <= size_mb * 2**20:
+            buckets *= 2
+        self.mask = buckets - 1
+        entries = 2 * buckets
+
+        self.keys = array('Q', bytes(8 * entries))
+        self.values = array('d', bytes(8 * entries))
+        self.depths = array('b', bytes(entries))
+        self.flags = array('B', bytes(entries))   # 0 for an empty entry
+        self.generations = array('B', bytes(entries))
+        self.moves = array('H', bytes(2 * entries))
+
+        self.generation = 0
+        self.count = 0  # entries in use
+
+    def __len__(self):
+        return self.count
+
+    """
+    Starts a new search: entries from earlier searches may be replaced by shallower ones
+    """
+    def new_search(self):
+        self.generation = (self.generation + 1) % 256
+
+    """
+    Looks a position up
+    Params:
+    - key: 64-bit key of the position
+    Returns: (value, depth, flag, best move or None), or None if it isn't in the table
+    """
+    def probe(self, key):
+        slot = (key & self.mask) * 2
+        for i in (slot, slot + 1):
+            if self.flags[i] and self.keys[i] == key:
+                return self.values[i], self.depths[i], self.flags[i], decode_move(self.moves[i])
+        return None
+
+    """
+    Stores the result of searching a position
+    Params:
+    - key: 64-bit key of the position
+    - value: value found by the search
+    - depth: depth the position was searched to
+    - flag: EXACT, LOWER or UPPER
+    - move: best move found, or None
+    """
+    def store(self, key, value, depth, flag, move):
+        slot = (key & self.mask) * 2
+        # the depth-preferred entry takes the position if it holds it already, is shallower
+        # or is left over from an earlier search; otherwise it goes in the always-replace one
+        i = slot
+        if (self.flags[i] and self.keys[i] != key and self.depths[i] > depth
+                and self.generations[i] == self.generation):
+            i = slot + 1
+        if not self.flags[i]:
+            self.count += 1
+
+        self.keys[i] = key
+        self.values[i] = value
+        self.depths[i] = depth
+        self.flags[i] = flag
+        self.generations[i] = self.generation
+        self.moves[i] = encode_move(move)
+
+
+"""
+Packs a move into 16 bits: from square, to square, promotion piece type
+Params:
+- move: chess.Move or None
+Returns: the packed move, 0 for None (no move goes from a1 to a1)
+"""
+def encode_move(move):
+    if move is None:
+        return 0
+    return move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+
+
+"""
+Unpacks a move packed by encode_move
+Params:
+- code: packed move
+Returns: chess.Move, or None for 0
+"""
+def decode_move(code):
+    if code == 0:
+        return None
+    return chess.Move(code & 63, code >> 6 & 63, code >> 12 or None)
@@ -4,35 +4,147 @@ Dartmouth COSC 76, Fall 2023
 """
 
 import random
+import chess
+
+
+# squares of the rooks that castling rights are recorded by
+CASTLING_SQUARES = [chess.A1, chess.H1, chess.A8, chess.H8]
 
 
 class ZobristHash:
     def __init__(self):
-        self.zobrist_table = [[[random.randint(1, 2**64 - 1) for k in range(12)] for j in range(8)] for i in range(8)]
+        # one random key per square and piece (white pawn..king, then black pawn..king)
+        self.zobrist_table = [[random.randint(1, 2**64 - 1) for k in range(12)] for square in range(64)]
+        self.side_key = random.randint(1, 2**64 - 1)  # XOR-ed in when black is to move
+        self.castling_keys = [random.randint(1, 2**64 - 1) for square in CASTLING_SQUARES]
+        self.ep_keys = [random.randint(1, 2**64 - 1) for file in range(8)]
+        self.castling_cache = {}  # castling_rights bitboard -> XOR of its castling keys
 
-    def hash(self, board):
+        self.key = 0      # key of the board the search is on, kept up to date by push and pop
+        self.state = 0    # state_key part of self.key
+        self.stack = []   # (key, state) of the boards before each pushed move
 
+    """
+    Computes the full Zobrist key of a board from scratch: its pieces, side to move,
+    castling rights and en passant square (only if an en passant capture is legal, so
+    positions that differ in nothing else share a key, as in Polyglot)
+    Params:
+    - board: chess board to hash
+    Returns: 64-bit integer key
+    """
+    def hash(self, board):
         h = 0  # initialize hash value to 0
 
-        # iterate over each square on chess board
-        for row in range(8):
-            for col in range(8):
-                piece = board.piece_at(row * 8 + col)
+        # XOR-ing hash value with the key of every piece on the board
+        for square, piece in board.piece_map().items():
+            h ^= self.zobrist_table[square][piece_index(piece.piece_type, piece.color)]
 
-                # check if square is not empty
-                if piece is not None:
-                    # retrieve type and color of the piece
-                    piece_type = piece.piece_type
-                    color = piece.color
+        return h ^ self.state_key(board)
 
-                    # calculate index based on piece type and color
-                    if color:
-                        index = piece_type - 1
-                    else:
-                        index = piece_type - 1 + 6
+    """
+    Keys of the parts of a board other than its pieces
+    Params:
+    - board: chess board
+    Returns: XOR of the side to move, castling and en passant keys
+    """
+    def state_key(self, board):
+        h = self.castling_key(board.castling_rights)
+        if board.ep_square is not None and board.has_legal_en_passant():
+            h ^= self.ep_keys[chess.square_file(board.ep_square)]
+        if board.turn == chess.BLACK:
+            h ^= self.side_key
+        return h
 
-                    # XOR-ing hash value with corresponding value from Zobrist table
-                    h ^= self.zobrist_table[row][col][index]
+    """
+    Keys of a set of castling rights
+    Params:
+    - castling_rights: bitboard of the rooks that can still castle
+    Returns: XOR of their castling keys
+    """
+    def castling_key(self, castling_rights):
+        if castling_rights not in self.castling_cache:
+            h = 0
+            for i, square in enumerate(CASTLING_SQUARES):
+                if castling_rights & chess.BB_SQUARES[square]:
+                    h ^= self.castling_keys[i]
+            self.castling_cache[castling_rights] = h
+        return self.castling_cache[castling_rights]
 
-        return h
+    """
+    Starts tracking a board: sets the current key to the board's full key
+    Params:
+    - board: chess board the search starts from
+    """
+    def reset(self, board):
+        self.key = self.hash(board)
+        self.state = self.state_key(board)
+        self.stack = []
+
+    """
+    Makes a move on the board and updates the current key by XOR-ing out what the move
+    changes (the moved, captured and promoted pieces, the castling rook, the side to move,
+    the castling rights and the en passant square) and XOR-ing in what replaces it
+    Params:
+    - board: chess board the key was reset to
+    - move: legal move to make
+    """
+    def push(self, board, move):
+        table = self.zobrist_table
+        h = self.key
+        self.stack.append((h, self.state))
+
+        h ^= self.state
 
+        from_square = move.from_square
+        to_square = move.to_square
+        color = board.turn
+        piece_type = board.piece_type_at(from_square)
+        h ^= table[from_square][piece_index(piece_type, color)]
+
+        if piece_type == chess.KING and board.is_castling(move):
+            rank = chess.square_rank(from_square)
+            if board.is_kingside_castling(move):
+                to_square = chess.square(6, rank)
+                rook_from, rook_to = chess.square(7, rank), chess.square(5, rank)
+            else:
+                to_square = chess.square(2, rank)
+                rook_from, rook_to = chess.square(0, rank), chess.square(3, rank)
+            rook = piece_index(chess.ROOK, color)
+            h ^= table[rook_from][rook] ^ table[rook_to][rook]
+        else:
+            captured_type = board.piece_type_at(to_square)
+            if captured_type is not None:
+                h ^= table[to_square][piece_index(captured_type, not color)]
+            elif piece_type == chess.PAWN and to_square == board.ep_square:
+                captured_square = chess.square(chess.square_file(to_square), chess.square_rank(from_square))
+                h ^= table[captured_square][piece_index(chess.PAWN, not color)]
+
+        if move.promotion is not None:
+            piece_type = move.promotion
+        h ^= table[to_square][piece_index(piece_type, color)]
+
+        board.push(move)
+        self.state = self.state_key(board)
+        self.key = h ^ self.state
+
+    """
+    Takes back the last move pushed, restoring the key from before it
+    Params:
+    - board: chess board the move was pushed on
+    """
+    def pop(self, board):
+        board.pop()
+        self.key, self.state = self.stack.pop()
+
+
+"""
+Index of a piece in a square's list of keys
+Params:
+- piece_type: chess.PAWN..chess.KING
+- color: chess.WHITE or chess.BLACK
+Returns: 0-5 for white pieces, 6-11 for black ones
+"""
+def piece_index(piece_type, color):
+    if color:
+        return piece_type - 1
+    return piece_type - 1 + 6
@@ -9,6 +9,7 @@ from MinimaxAI import MinimaxAI
 from AlphaBetaAI import AlphaBetaAI
 from AlphaBetaAI_TT import AlphaBetaAI_TT
 from AlphaBetaAI2 import AlphaBetaAI2
+from IterativeDeepeningAI import IterativeDeepeningAI
 from ChessGame import ChessGame
 import time
 
@@ -23,6 +24,7 @@ player1 = AlphaBetaAI2(2)
 # player1 = RandomAI()
 # player1 = MinimaxAI(3)
 # player1 = AlphaBetaAI_TT(2)
+# player1 = IterativeDeepeningAI(8, time_limit=5)
 player2 = RandomAI()
 
 game = ChessGame(player1, player2)
@@ -1,3 +1,6 @@
+import mmap
+import os
+import struct
 from time import sleep
 
 # Maze.py
@@ -23,42 +26,120 @@ from time import sleep
 # the command \robot x y adds a robot at a location. The first robot added
 # has index 0, and so forth.
 
+# Binary maze (.mazb) format, for big mazes that are loaded again and again:
+#  a header of MAZB_HEADER (magic, format version, width, height, number of robots),
+#  then the robot locations as 32-bit ints (x0, y0, x1, y1, ...), then the map, one byte
+#  per cell in self.map order. A .mazb file is memory-mapped, not parsed, so loading it
+#  takes the same time whatever the size of the maze, and the pages of the map are only
+#  read in from disk when they are used.
 
 
+WALL = ord("#")
+
+MAZB_MAGIC = b"MAZB"
+MAZB_VERSION = 1
+MAZB_HEADER = struct.Struct("<4sIIII")
+
 
 class Maze:
 
     # internal structure:
-    #   self.walls: set of tuples with wall locations
+    #   self.map: one byte (the character from the file) per cell, in self.index order;
+    #     a bytearray, or a read-only memoryview of a memory-mapped .mazb file
+    #   self.mapped_file: the mmap of a .mazb file, None for a text maze
     #   self.width: number of columns
-    #   self.rows
-
-    def __init__(self, mazefilename):
-        self.robotloc = []
-        # read the maze file into a list of strings
-        f = open(mazefilename)
-        lines = []
-        for line in f:
-            line = line.strip()
-            # ignore blank limes
-            if len(line) == 0:
-                pass
-            elif line[0] == "\\":
-                #print("command")
-                # there's only one command, \robot, so assume it is that
-                parms = line.split()
-                x = int(parms[1])
-                y = int(parms[2])
-                self.robotloc.append(x)
-                self.robotloc.append(y)
+    #   self.height: number of rows
+    #   self.robotloc: robot locations, x0, y0, x1, y1, ...
+
+    # Load a maze from a text maze file, or from a .mazb file. With cache=True, a text
+    #  maze is loaded from the .mazb file next to it (same name, .mazb extension) if that
+    #  is at least as new, and the .mazb file is written after parsing otherwise.
+    def __init__(self, mazefilename, cache=False):
+        if mazefilename.endswith(".mazb"):
+            self.load_binary(mazefilename)
+        elif cache:
+            cachefilename = os.path.splitext(mazefilename)[0] + ".mazb"
+            if (os.path.exists(cachefilename)
+                    and os.path.getmtime(cachefilename) >= os.path.getmtime(mazefilename)):
+                self.load_binary(cachefilename)
             else:
-                lines.append(line)
-        f.close()
-
-        self.width = len(lines[0])
-        self.height = len(lines)
-
-        self.map = list("".join(lines))
+                self.load_text(mazefilename)
+                self.save_binary(cachefilename)
+        else:
+            self.load_text(mazefilename)
+
+    # Parse a text maze file a line at a time, appending each row of the map straight
+    #  onto a bytearray, so only one line of the file is held as a string at a time
+    def load_text(self, mazefilename):
+        self.robotloc = []
+        self.map = bytearray()
+        self.mapped_file = None
+        self.width = None
+        self.height = 0
+
+        with open(mazefilename, "rb") as f:
+            for line in f:
+                line = line.strip()
+                # ignore blank limes
+                if len(line) == 0:
+                    pass
+                elif line[0] == ord("\\"):
+                    # there's only one command, \robot, so assume it is that
+                    parms = line.split()
+                    x = int(parms[1])
+                    y = int(parms[2])
+                    self.robotloc.append(x)
+                    self.robotloc.append(y)
+                else:
+                    if self.width is None:
+                        self.width = len(line)
+                    elif len(line) != self.width:
+                        raise ValueError("{}: row {} is {} cells wide, not {}".format(
+                            mazefilename, self.height, len(line), self.width))
+                    self.map += line
+                    self.height += 1
+
+        if self.width is None:
+            raise ValueError(mazefilename + ": no rows of floor and walls in the maze")
+
+    # Memory-map a .mazb file. The map is a read-only view of the file, so the maze's
+    #  walls can't be changed. The mapping stays open until close() is called (or the
+    #  with block the maze was opened in ends)
+    def load_binary(self, mazefilename):
+        with open(mazefilename, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.width, self.height, num_robots = MAZB_HEADER.unpack_from(data)
+        if magic != MAZB_MAGIC or version != MAZB_VERSION:
+            data.close()
+            raise ValueError(mazefilename + ": not a version " + str(MAZB_VERSION) + " .mazb file")
+
+        robots_start = MAZB_HEADER.size
+        map_start = robots_start + 8 * num_robots
+        self.robotloc = list(struct.unpack_from("<" + str(2 * num_robots) + "i", data, robots_start))
+        self.map = memoryview(data)[map_start:map_start + self.width * self.height]
+        self.mapped_file = data
+
+    # Write the maze to a .mazb file
+    def save_binary(self, mazefilename):
+        with open(mazefilename, "wb") as f:
+            f.write(MAZB_HEADER.pack(MAZB_MAGIC, MAZB_VERSION, self.width, self.height, len(self.robotloc) // 2))
+            f.write(struct.pack("<" + str(len(self.robotloc)) + "i", *self.robotloc))
+            f.write(self.map)
+
+    # Unmap a .mazb file; the maze can't be used after this. A text maze has nothing
+    #  to close
+    def close(self):
+        if self.mapped_file is not None:
+            self.map.release()
+            self.mapped_file.close()
+            self.mapped_file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def index(self, x, y):
         return (self.height - y - 1) * self.width + x
@@ -70,13 +151,13 @@ class Maze:
         if y < 0 or y >= self.height:
             return False
 
-        return self.map[self.index(x, y)] != "#"
+        return self.map[self.index(x, y)] != WALL
 
     def get_robot_location(self):
         return self.robotloc
 
     def get_color(self, x, y):
-        return self.map[self.index(x, y)]
+        return chr(self.map[self.index(x, y)])
 
     def get_neighbors(self, x, y):
         neighbors = []
@@ -108,7 +189,7 @@ class Maze:
     #  that they will need to be printed out in.
     def create_render_list(self):
         # print(self.robotloc)
-        renderlist = list(self.map)
+        renderlist = list(str(self.map, "ascii"))
 
         robot_number = 0
         for index in range(0, len(self.robotloc), 2):